@@ -0,0 +1,167 @@
+"""
+Benchmark des pages du dashboard sur des cohortes synthétiques de taille croissante.
+
+Chaque page est exécutée sans interface (streamlit remplacé par un module factice) ;
+on mesure le temps d'exécution et le pic mémoire. Les résultats peuvent être
+comparés à une référence : le script échoue si un seuil de régression est dépassé.
+
+Exemples :
+    python benchmarks/bench_pages.py --tailles 1000,100000 --enregistrer benchmarks/reference.json
+    python benchmarks/bench_pages.py --tailles 1000,100000 --reference benchmarks/reference.json --seuil 1.25
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RACINE, "dashboard"))
+
+import streamlit_factice  # noqa: E402
+
+st = streamlit_factice.installer()
+
+import donnees  # noqa: E402  (même configuration pandas que le dashboard)
+from traitements_page import traitements  # noqa: E402
+from analyse_comparative_page import analyse_traitements  # noqa: E402
+from pharmacovigilance_page import pharmacovigilance  # noqa: E402
+from recherche_patients_page import recherche_patients  # noqa: E402
+from aide_decision_page import aide_decision  # noqa: E402
+from extraction_nlp_page import extraction_nlp  # noqa: E402
+import nlp_cache  # noqa: E402
+import statistiques_cohorte  # noqa: E402
+from cube_cohorte import construire_cube  # noqa: E402
+from index_recherche import construire_index  # noqa: E402
+from similarite_patients import construire_similarite  # noqa: E402
+from index_termes import construire_index_termes  # noqa: E402
+
+
+def preparer_extraction():
+    # L'exemple pré-rempli est analysé à chaque exécution, sans passer par le cache
+    st.valeurs["Utiliser un exemple pré-rempli"] = True
+    nlp_cache._CACHE.clear()
+
+
+# Page -> (fonction de la page, préparation éventuelle avant chaque exécution,
+#          données passées à la page : "df", "effets", "cube", "index",
+#          "similarite" et/ou "termes")
+PAGES = {
+    "traitements": (traitements, None, ("df", "cube")),
+    "analyse_traitements": (analyse_traitements, None, ("cube",)),
+    "pharmacovigilance": (pharmacovigilance, None, ("df", "effets")),
+    "recherche_patients": (recherche_patients, None, ("df", "cube", "index")),
+    "aide_decision": (aide_decision, None, ("similarite",)),
+    "extraction_nlp": (extraction_nlp, preparer_extraction, ("df", "termes")),
+}
+
+
+def cohorte_synthetique(base, taille, graine=0):
+    """
+    Cohorte de `taille` patients tirés (avec remise) dans le dataset de base.
+    """
+    cohorte = base.sample(n=taille, replace=True, random_state=graine).reset_index(drop=True)
+    cohorte["id"] = range(1, taille + 1)
+    return cohorte
+
+
+def preparer_donnees(df):
+    """
+    Données dérivées du dataset, construites une fois comme au chargement du dashboard.
+    """
+    effets = donnees.exploser_effets(df)
+    return {
+        "df": df,
+        "effets": effets,
+        "cube": construire_cube(df, effets),
+        "index": construire_index(df),
+        "similarite": construire_similarite(df),
+        "termes": construire_index_termes(df),
+    }
+
+
+def executer(page, donnees_pages):
+    fonction, preparation, arguments = PAGES[page]
+    st.valeurs.clear()
+    st.session_state.clear()
+    # Statistiques recalculées à chaque exécution : on mesure le calcul, pas le cache
+    statistiques_cohorte._CACHE.clear()
+    if preparation is not None:
+        preparation()
+    try:
+        fonction(*(donnees_pages[nom] for nom in arguments))
+    except streamlit_factice.ArretPage:
+        pass
+
+
+def mesurer(page, donnees_pages, repetitions):
+    """
+    Renvoie le meilleur temps (ms) sur `repetitions` exécutions et le pic mémoire (Mo),
+    mesuré lors d'une exécution séparée pour ne pas fausser le temps.
+    """
+    temps = []
+    for _ in range(repetitions):
+        gc.collect()
+        debut = time.perf_counter()
+        executer(page, donnees_pages)
+        temps.append((time.perf_counter() - debut) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    executer(page, donnees_pages)
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"temps_ms": round(min(temps), 3), "memoire_mo": round(pic / 1e6, 3)}
+
+
+def comparer(resultats, reference, seuil):
+    """
+    Liste des mesures qui dépassent `seuil` fois la valeur de référence.
+    """
+    regressions = []
+    for cle, mesures in resultats.items():
+        if cle not in reference:
+            continue
+        for metrique, valeur in mesures.items():
+            valeur_reference = reference[cle].get(metrique)
+            if valeur_reference and valeur > valeur_reference * seuil:
+                regressions.append(
+                    f"{cle} {metrique}: {valeur} > {seuil} x {valeur_reference}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des pages du dashboard")
+    parser.add_argument("--tailles", default="1000,100000,1000000")
+    parser.add_argument("--pages", default=",".join(PAGES))
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--dataset", default=os.path.join(RACINE, "data", "dataset.csv"))
+    parser.add_argument("--reference", help="Fichier JSON de référence à comparer")
+    parser.add_argument("--seuil", type=float, default=1.25, help="Ratio maximal toléré par rapport à la référence")
+    parser.add_argument("--enregistrer", help="Écrit les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+
+    base = donnees.lire_dataset(args.dataset)
+    resultats = {}
+    for taille in [int(t) for t in args.tailles.split(",")]:
+        donnees_pages = preparer_donnees(cohorte_synthetique(base, taille))
+        for page in args.pages.split(","):
+            mesures = mesurer(page, donnees_pages, args.repetitions)
+            resultats[f"{page}@{taille}"] = mesures
+            print(f"{page:<22} {taille:>10} lignes  {mesures['temps_ms']:>10.1f} ms  {mesures['memoire_mo']:>9.1f} Mo")
+
+    if args.enregistrer:
+        with open(args.enregistrer, "w", encoding="utf-8") as fichier:
+            json.dump(resultats, fichier, indent=2)
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as fichier:
+            regressions = comparer(resultats, json.load(fichier), args.seuil)
+        if regressions:
+            print("\nRégressions détectées :")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\nAucune régression détectée.")
@@ -0,0 +1,104 @@
+"""
+Test de charge du service d'extraction.
+
+Exemple (démarre le service, envoie 2000 requêtes avec 64 clients concurrents) :
+    python benchmarks/charge_service.py --demarrer --requetes 2000 --concurrence 64
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CORPUS_DEFAUT = os.path.join(RACINE, "data", "mini_dataset.csv")
+sys.path.insert(0, os.path.join(RACINE, "dashboard"))
+
+from service_extraction import percentile  # noqa: E402
+
+
+def charger_textes(chemin, colonne="texte_compte_rendu"):
+    if chemin.endswith(".jsonl"):
+        with open(chemin, encoding="utf-8") as fichier:
+            return [json.loads(ligne)[colonne] for ligne in fichier if ligne.strip()]
+    with open(chemin, encoding="utf-8", newline="") as fichier:
+        return [ligne[colonne] for ligne in csv.DictReader(fichier)]
+
+
+async def attendre_service(client, url, delai=30):
+    echeance = time.perf_counter() + delai
+    while time.perf_counter() < echeance:
+        try:
+            await client.fetch(f"{url}/stats")
+            return
+        except (ConnectionError, OSError, HTTPClientError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Le service {url} ne répond pas")
+
+
+async def lancer_charge(url, textes, nb_requetes, concurrence):
+    client = AsyncHTTPClient(max_clients=concurrence)
+    await attendre_service(client, url)
+    latences = []
+    erreurs = 0
+    file = asyncio.Queue()
+    for i in range(nb_requetes):
+        file.put_nowait(textes[i % len(textes)])
+
+    async def client_virtuel():
+        nonlocal erreurs
+        while not file.empty():
+            texte = file.get_nowait()
+            debut = time.perf_counter()
+            try:
+                await client.fetch(
+                    f"{url}/extract", method="POST",
+                    body=json.dumps({"texte": texte}),
+                    headers={"Content-Type": "application/json"},
+                )
+                latences.append((time.perf_counter() - debut) * 1000)
+            except HTTPClientError:
+                erreurs += 1
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client_virtuel() for _ in range(concurrence)))
+    duree = time.perf_counter() - debut
+    stats_service = json.loads((await client.fetch(f"{url}/stats")).body)
+    return {
+        "requetes": nb_requetes,
+        "erreurs": erreurs,
+        "duree_s": round(duree, 3),
+        "requetes_par_s": round(nb_requetes / duree, 1) if duree > 0 else 0.0,
+        "latence_p50_ms": round(percentile(latences, 50), 3),
+        "latence_p99_ms": round(percentile(latences, 99), 3),
+        "service": stats_service,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test de charge du service d'extraction")
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--corpus", default=CORPUS_DEFAUT)
+    parser.add_argument("--requetes", type=int, default=1000)
+    parser.add_argument("--concurrence", type=int, default=32)
+    parser.add_argument("--demarrer", action="store_true", help="Démarre le service local pendant le test")
+    args = parser.parse_args()
+
+    service = None
+    if args.demarrer:
+        port = args.url.rsplit(":", 1)[-1]
+        service = subprocess.Popen(
+            [sys.executable, os.path.join(RACINE, "dashboard", "service_extraction.py"), "--port", port]
+        )
+    try:
+        resultats = asyncio.run(lancer_charge(args.url, charger_textes(args.corpus), args.requetes, args.concurrence))
+        print(json.dumps(resultats, ensure_ascii=False, indent=2))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
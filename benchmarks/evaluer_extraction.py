@@ -0,0 +1,91 @@
+"""
+Débit et qualité de l'extraction sur un corpus annoté (data/generate_reports.py).
+
+Le corpus est analysé en lot (extraction_batch.py), puis les entités extraites
+sont comparées aux annotations de référence : une entité est correcte si sa
+catégorie et sa position (début, fin) sont exactes.
+
+Exemple :
+    python data/generate_reports.py --n 20000 --output corpus.jsonl
+    python benchmarks/evaluer_extraction.py corpus.jsonl --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import pyarrow.parquet as pq
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(RACINE, "dashboard"))
+
+from extraction_batch import extraire_corpus  # noqa: E402
+from nlp_entites import CATEGORIES  # noqa: E402
+
+
+def lire_references(chemin):
+    with open(chemin, encoding="utf-8") as fichier:
+        for ligne in fichier:
+            if ligne.strip():
+                enregistrement = json.loads(ligne)
+                yield enregistrement["id"], enregistrement["entites"]
+
+
+def lire_extractions(chemin):
+    for lot in pq.ParquetFile(chemin).iter_batches(columns=["id", "entites"]):
+        for ligne in lot.to_pylist():
+            yield ligne["id"], ligne["entites"]
+
+
+def comparer(references, extractions):
+    """
+    Vrais positifs, faux positifs et faux négatifs par catégorie, les deux flux
+    étant dans le même ordre de documents.
+    """
+    comptes = {categorie: {"vp": 0, "fp": 0, "fn": 0} for categorie in CATEGORIES}
+    for (id_reference, attendues), (id_extrait, trouvees) in zip(references, extractions):
+        if id_reference != id_extrait:
+            raise ValueError(f"Documents désalignés : {id_reference} != {id_extrait}")
+        attendues = {(e["categorie"], e["debut"], e["fin"]) for e in attendues}
+        trouvees = {(e["categorie"], e["debut"], e["fin"]) for e in trouvees}
+        for categorie, debut, fin in attendues | trouvees:
+            compte = comptes.setdefault(categorie, {"vp": 0, "fp": 0, "fn": 0})
+            cle = (categorie, debut, fin)
+            if cle in attendues and cle in trouvees:
+                compte["vp"] += 1
+            elif cle in trouvees:
+                compte["fp"] += 1
+            else:
+                compte["fn"] += 1
+    return comptes
+
+
+def scores(compte):
+    precision = compte["vp"] / (compte["vp"] + compte["fp"]) if compte["vp"] + compte["fp"] else 0.0
+    rappel = compte["vp"] / (compte["vp"] + compte["fn"]) if compte["vp"] + compte["fn"] else 0.0
+    f1 = 2 * precision * rappel / (precision + rappel) if precision + rappel else 0.0
+    return precision, rappel, f1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Évaluation de l'extraction sur un corpus annoté")
+    parser.add_argument("corpus", help="Corpus JSONL produit par data/generate_reports.py")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--taille-lot", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        sortie = os.path.join(dossier, "extractions.parquet")
+        stats = extraire_corpus(args.corpus, sortie, taille_lot=args.taille_lot, workers=args.workers)
+        comptes = comparer(lire_references(args.corpus), lire_extractions(sortie))
+
+    print(f"{stats['documents']} comptes-rendus en {stats['duree_s']:.2f} s ({stats['docs_par_s']:.1f} docs/s)\n")
+    total = {"vp": 0, "fp": 0, "fn": 0}
+    for categorie, compte in comptes.items():
+        for cle in total:
+            total[cle] += compte[cle]
+        precision, rappel, f1 = scores(compte)
+        print(f"{categorie:<12} précision {precision:6.1%}  rappel {rappel:6.1%}  F1 {f1:6.1%}")
+    precision, rappel, f1 = scores(total)
+    print(f"{'global':<12} précision {precision:6.1%}  rappel {rappel:6.1%}  F1 {f1:6.1%}")
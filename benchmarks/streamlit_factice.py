@@ -0,0 +1,122 @@
+"""
+Remplaçant minimal de streamlit pour exécuter les pages sans interface.
+
+Les widgets renvoient leur valeur par défaut, sauf si une valeur est imposée
+dans `valeurs` (clé : libellé du widget). Les boutons sont considérés comme
+cliqués pour que les calculs déclenchés par un bouton soient mesurés.
+Tous les autres appels (titres, graphiques, tableaux...) sont ignorés.
+"""
+import sys
+
+valeurs = {}
+session_state = {}
+
+
+class ArretPage(Exception):
+    """Levée par st.stop() pour interrompre la page comme le ferait streamlit."""
+
+
+class _Element:
+    """Colonne, expander ou conteneur : délègue tout au module factice."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __getattr__(self, nom):
+        return getattr(sys.modules[__name__], nom)
+
+
+def _rien(*args, **kwargs):
+    return _Element()
+
+
+sidebar = _Element()
+
+
+def _valeur(label, defaut):
+    return valeurs.get(label, defaut)
+
+
+def columns(spec, *args, **kwargs):
+    nombre = spec if isinstance(spec, int) else len(spec)
+    return [_Element() for _ in range(nombre)]
+
+
+def tabs(libelles, *args, **kwargs):
+    return [_Element() for _ in libelles]
+
+
+def selectbox(label, options, index=0, *args, **kwargs):
+    options = list(options)
+    return _valeur(label, options[index] if options else None)
+
+
+def radio(label, options, index=0, *args, **kwargs):
+    return selectbox(label, options, index)
+
+
+def multiselect(label, options, default=None, *args, **kwargs):
+    return _valeur(label, list(default or []))
+
+
+def slider(label, min_value=None, max_value=None, value=None, *args, **kwargs):
+    return _valeur(label, value if value is not None else min_value)
+
+
+def number_input(label, min_value=None, max_value=None, value=None, *args, **kwargs):
+    return _valeur(label, value if value is not None else min_value)
+
+
+def text_area(label, value="", *args, **kwargs):
+    return _valeur(label, value)
+
+
+def text_input(label, value="", *args, **kwargs):
+    return _valeur(label, value)
+
+
+def date_input(label, value=None, *args, **kwargs):
+    return _valeur(label, value)
+
+
+def checkbox(label, value=False, *args, **kwargs):
+    return _valeur(label, value)
+
+
+def button(label, *args, **kwargs):
+    return _valeur(label, True)
+
+
+def download_button(label, *args, **kwargs):
+    return _valeur(label, False)
+
+
+def stop():
+    raise ArretPage()
+
+
+def _decorateur_cache(fonction=None, **kwargs):
+    # Utilisable avec ou sans parenthèses : @st.cache_resource / @st.cache_resource(...)
+    if fonction is None:
+        return lambda f: f
+    return fonction
+
+
+cache_resource = _decorateur_cache
+cache_data = _decorateur_cache
+
+
+def __getattr__(nom):
+    return _rien
+
+
+def installer():
+    """
+    Enregistre ce module à la place de streamlit dans sys.modules.
+    """
+    module = sys.modules[__name__]
+    sys.modules["streamlit"] = module
+    return module
@@ -1,9 +1,10 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import random
+from chronometre import afficher_mesures, chronometrer
+from similarite_patients import plus_proches_voisins, recommander
 
-def aide_decision(df):
+def aide_decision(index):
     # Titre avec emoji
     st.title("🧠 Aide à la décision thérapeutique")
     
@@ -25,14 +26,16 @@ def aide_decision(df):
         # Utilisation de widgets simples
         age = st.slider("Âge du patient", 18, 90, 45)
         sexe = st.radio("Sexe", ["H", "F"])
+        anciennete = st.slider("Ancienneté de la maladie (années)", 1, 20, 3)
         
     # Deuxième colonne - Informations sur la maladie
     with col2:
         st.subheader("Caractéristiques de la maladie")
         # Liste déroulante simple
-        maladie = st.selectbox("Type de MICI", options=df["maladie"].unique())
+        maladie = st.selectbox("Type de MICI", options=index.maladies)
         # Checkbox pour options supplémentaires
         severe = st.checkbox("Forme sévère")
+        nb_voisins = st.slider("Nombre de patients similaires", 10, 1000, 200)
     
     # Séparateur visuel
     st.markdown("---")
@@ -40,40 +43,21 @@ def aide_decision(df):
     # Bouton d'action principal
     if st.button("Générer une recommandation de traitement", use_container_width=True):
         
+        # Mesure du temps de chaque étape
+        mesures = {}
+        
         # Animation de chargement
         with st.spinner("Analyse en cours..."):
-            # Simulation d'un petit délai pour donner l'impression de calcul
-            import time
-            time.sleep(1.5)
-            
-            # Filtrage basique des patients similaires
-            patients_similaires = df[
-                (df["sexe"] == sexe) & 
-                (df["maladie"] == maladie)
-            ]
+            # Plus proches voisins du profil (âge, ancienneté, sexe, maladie, sévérité)
+            with chronometrer(mesures, "patients_similaires"):
+                rangs, distances = plus_proches_voisins(index, age, anciennete, sexe, maladie, severe, nb_voisins)
             
-            # Comptage simple des résultats par traitement
-            resultats = {}
-            for traitement in patients_similaires["traitement"].unique():
-                patients_traitement = patients_similaires[patients_similaires["traitement"] == traitement]
-                # Calcul simple d'efficacité 
-                efficacite = (patients_traitement["reponse_traitement"] == "Efficace").mean() * 100
-                resultats[traitement] = {
-                    "efficacite": efficacite,
-                    "patients": len(patients_traitement)
-                }
+            # Efficacité par traitement, pondérée par la proximité des voisins
+            with chronometrer(mesures, "recommandation"):
+                resultats_df = recommander(index, rangs, distances)
         
         # Affichage des résultats
-        if resultats:
-            # Transformation en DataFrame pour faciliter le tri
-            resultats_df = pd.DataFrame([
-                {"traitement": t, "efficacite": r["efficacite"], "patients": r["patients"]} 
-                for t, r in resultats.items()
-            ])
-            
-            # Tri par efficacité
-            resultats_df = resultats_df.sort_values("efficacite", ascending=False)
-            
+        if not resultats_df.empty:
             # Recommandation principale
             meilleur_traitement = resultats_df.iloc[0]["traitement"]
             meilleure_efficacite = resultats_df.iloc[0]["efficacite"]
@@ -82,10 +66,10 @@ def aide_decision(df):
             st.success(f"""
                 ### Traitement recommandé: **{meilleur_traitement}**
                 
-                Pour un patient de {age} ans, {sexe}, avec {maladie}
+                Pour un patient de {age} ans, {sexe}, avec {maladie}{" (forme sévère)" if severe else ""}
                 
                 * Taux de réussite estimé: **{meilleure_efficacite:.1f}%**
-                * Basé sur {resultats_df.iloc[0]["patients"]} cas similaires
+                * Basé sur {resultats_df.iloc[0]["patients"]} cas similaires parmi les {len(rangs)} plus proches
             """)
             
             # Graphique simple pour visualiser les options
@@ -106,11 +90,14 @@ def aide_decision(df):
                 resultats_df.rename(columns={
                     "traitement": "Traitement", 
                     "efficacite": "Efficacité (%)", 
-                    "patients": "Nombre de patients"
-                }).round(1)
+                    "patients": "Nombre de patients",
+                    "distance_moyenne": "Distance moyenne"
+                }).round(2)
             )
             
         else:
             # Message d'erreur simple
             st.error("Pas assez de données pour ce profil de patient.")
+        
+        afficher_mesures(mesures, "aide_decision")
             
@@ -2,8 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from cube_cohorte import compter_effets, filtrer_cube, nombre_patients
+from statistiques_cohorte import repartition_reponses, statistiques_traitements, taux_reponses
 
-def analyse_traitements(df):
+def analyse_traitements(cube):
     # --- 1. Titre et description ---
     st.title("📊 Analyse comparative des traitements")
     st.write(
@@ -12,62 +14,61 @@ def analyse_traitements(df):
     
     # --- 2. Section des filtres ---
     st.subheader("🔍 Filtres de population")
+    ages = cube.comptes["age"]
     col1, col2, col3 = st.columns(3)
     with col1:
         age_min, age_max = st.slider(
             "Tranche d'âge :", 
-            min_value=int(df["age"].min()), 
-            max_value=int(df["age"].max()), 
-            value=(int(df["age"].min()), int(df["age"].max()))
+            min_value=int(ages.min()), 
+            max_value=int(ages.max()), 
+            value=(int(ages.min()), int(ages.max()))
         )
     with col2:
-        sexes_disponibles = ["Tous"] + list(df["sexe"].unique())
+        sexes_disponibles = ["Tous"] + list(cube.comptes["sexe"].unique())
         sexe_selectionne = st.selectbox("Sexe :", sexes_disponibles)
     with col3:
-        maladies_disponibles = ["Toutes"] + list(df["maladie"].unique())
+        maladies_disponibles = ["Toutes"] + list(cube.comptes["maladie"].unique())
         maladie_selectionnee = st.selectbox("Type de MICI :", maladies_disponibles)
     
-    # --- 3. Application des filtres ---
-    df_filtre = df.copy()
-    df_filtre = df_filtre[(df_filtre["age"] >= age_min) & (df_filtre["age"] <= age_max)]
-    if sexe_selectionne != "Tous":
-        df_filtre = df_filtre[df_filtre["sexe"] == sexe_selectionne]
-    if maladie_selectionnee != "Toutes":
-        df_filtre = df_filtre[df_filtre["maladie"] == maladie_selectionnee]
+    # --- 3. Application des filtres (tranche du cube de la cohorte) ---
+    filtres = {
+        "age": (age_min, age_max),
+        "sexe": None if sexe_selectionne == "Tous" else sexe_selectionne,
+        "maladie": None if maladie_selectionnee == "Toutes" else maladie_selectionnee,
+    }
+    tranche = filtrer_cube(cube, **filtres)
+    
+    # Effectifs par traitement et par réponse, base de tous les indicateurs
+    statistiques = statistiques_traitements(cube, **filtres)
+    patients_par_traitement = statistiques["patients"]
+    nb_patients_filtre = int(patients_par_traitement.sum())
     
     # --- 4. Affichage des métriques dynamiques ---
     st.subheader("📈 Indicateurs pour la population filtrée")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Patients filtrés", len(df_filtre))
-    col2.metric("Traitements concernés", df_filtre["traitement"].nunique())
-    efficacite_moyenne = (df_filtre['reponse_traitement'] == 'Efficace').mean() * 100 if not df_filtre.empty else 0
+    col1.metric("Patients filtrés", nb_patients_filtre)
+    col2.metric("Traitements concernés", len(patients_par_traitement))
+    efficacite_moyenne = repartition_reponses(statistiques).get("Efficace", 0) / nb_patients_filtre * 100 if nb_patients_filtre else 0
     col3.metric("Efficacité moyenne", f"{efficacite_moyenne:.1f}%")
-    st.info(f"Population filtrée : {len(df_filtre)} patients sur {len(df)} patients totaux")
+    st.info(f"Population filtrée : {nb_patients_filtre} patients sur {nombre_patients(cube)} patients totaux")
     
     # Si aucun patient ne correspond aux critères, on arrête ici
-    if df_filtre.empty:
+    if nb_patients_filtre == 0:
         st.warning("Aucun patient ne correspond aux critères sélectionnés. Veuillez modifier les filtres.")
         return
 
     # --- 5. Calculs et graphiques basés sur les données filtrées ---
     
     # Calculer l'efficacité pour chaque traitement
-    resultats_par_traitement = []
-    for traitement in df_filtre["traitement"].unique():
-        df_traitement = df_filtre[df_filtre["traitement"] == traitement]
-        nb_patients = len(df_traitement)
-        taux_efficacite = (df_traitement["reponse_traitement"] == "Efficace").mean() * 100
-        taux_echec = (df_traitement["reponse_traitement"] == "Échec").mean() * 100
-        effets_secondaires = df_traitement["effets_secondaires"].str.len() > 0
-        taux_effets = effets_secondaires.mean() * 100
-        resultats_par_traitement.append({
-            "traitement": traitement,
-            "patients": nb_patients,
-            "taux_efficacite": taux_efficacite,
-            "taux_echec": taux_echec,
-            "taux_effets": taux_effets
-        })
-    df_resultats = pd.DataFrame(resultats_par_traitement)
+    reponses = ["Efficace", "Partiel", "Échec", "Rechute"]
+    taux = taux_reponses(statistiques, reponses)
+    df_resultats = pd.DataFrame({
+        "traitement": patients_par_traitement.index,
+        "patients": patients_par_traitement.to_numpy(),
+        "taux_efficacite": taux["Efficace"],
+        "taux_echec": taux["Échec"],
+        "taux_effets": statistiques["avec_effet"] / patients_par_traitement * 100,
+    }).reset_index(drop=True)
     
     # Comparaison principale - Graphique à barres horizontal
     st.subheader("🎯 Comparaison de l'efficacité des traitements")
@@ -104,19 +105,10 @@ def analyse_traitements(df):
     
     # Visualisation secondaire - Distribution des réponses
     st.subheader("📊 Distribution des réponses par traitement")
-    resultats_complets = []
-    for traitement in df_filtre["traitement"].unique():
-        df_traitement = df_filtre[df_filtre["traitement"] == traitement]
-        for reponse in ["Efficace", "Partiel", "Échec", "Rechute"]:
-            count = (df_traitement["reponse_traitement"] == reponse).sum()
-            pourcentage = (count / len(df_traitement)) * 100 if len(df_traitement) > 0 else 0
-            resultats_complets.append({
-                "traitement": traitement,
-                "reponse": reponse,
-                "count": count,
-                "pourcentage": pourcentage
-            })
-    df_reponses = pd.DataFrame(resultats_complets)
+    df_reponses = pd.DataFrame({
+        "count": statistiques.reindex(columns=reponses, fill_value=0).stack(),
+        "pourcentage": taux.stack(),
+    }).rename_axis(["traitement", "reponse"]).reset_index()
     fig2 = px.bar(
         df_reponses,
         x="traitement",
@@ -137,14 +129,9 @@ def analyse_traitements(df):
     
     # Analyse des effets secondaires
     st.subheader("⚠️ Principaux effets secondaires par traitement")
-    tous_effets = []
-    for effets in df_filtre["effets_secondaires"].dropna():
-        if effets:
-            effets_liste = effets.split(',')
-            tous_effets.extend([effet.strip() for effet in effets_liste])
+    effets_counts = compter_effets(tranche).sort_values(ascending=False).head(10)
     
-    if tous_effets:
-        effets_counts = pd.Series(tous_effets).value_counts().head(10)
+    if not effets_counts.empty:
         fig3 = px.bar(
             x=effets_counts.values,
             y=effets_counts.index,
@@ -165,7 +152,6 @@ def analyse_traitements(df):
         taux_efficacite_max = df_resultats.iloc[0]["taux_efficacite"]
         traitement_moins_efficace = df_resultats.iloc[-1]["traitement"]
         taux_efficacite_min = df_resultats.iloc[-1]["taux_efficacite"]
-        nb_patients_filtre = len(df_filtre)
         
         st.info(
             f"""
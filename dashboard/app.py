@@ -1,12 +1,7 @@
-import pandas as pd
 import streamlit as st
-import plotly.express as px
-from traitements_page import traitements  
-from analyse_comparative_page import analyse_traitements
-from pharmacovigilance_page import pharmacovigilance
-from recherche_patients_page import recherche_patients
-from aide_decision_page import aide_decision
-from extraction_nlp_page import extraction_nlp
+from donnees import charger_cube, charger_dataset, charger_effets, charger_index, charger_index_termes, charger_similarite
+from cube_cohorte import age_moyen, compter, nombre_patients
+from registre_pages import charger_page, prechauffer, temps_imports
 
 st.set_page_config(
     page_title="MediNLP - Accueil",
@@ -30,11 +25,22 @@ pages = [
 
 ]
 
+# Colonnes lues pour chaque page (None : toutes les colonnes). L'accueil,
+# l'analyse comparative et l'aide à la décision n'utilisent que le cube de la cohorte.
+COLONNES_PAR_PAGE = {
+    "💊 Traitements": ["traitement", "date_consultation"],
+    "⚠️ Pharmacovigilance": ["sexe", "traitement"],
+    "🔍 Recherche patients": None,
+    "🔍 Extraction NLP": ["id", "age", "sexe", "maladie", "traitement", "reponse_traitement"],
+}
+
 selected_page = st.sidebar.selectbox("Navigation", pages)
 
-df = pd.read_csv("data/dataset.csv")
+df = charger_dataset(COLONNES_PAR_PAGE[selected_page]) if selected_page in COLONNES_PAR_PAGE else None
 
 if selected_page == "🏠 Accueil":
+    import plotly.express as px
+
     st.title("🏥 MediNLP - Analyse des MICI")
     st.write(
         "Bienvenue sur MediNLP, le dashboard interactif d'analyse pharmaco-épidémiologique des MICI "
@@ -43,12 +49,16 @@ if selected_page == "🏠 Accueil":
     )
 
     # Métriques principales - Garder les 5 colonnes comme dans le code original
+    cube = charger_cube()
+    nb_patients = nombre_patients(cube)
+    par_maladie = compter(cube, ["maladie"])
+    noms_maladies = par_maladie.index.astype(str)
     col1, col2, col3, col4, col5 = st.columns(5)
-    col1.metric("👥 Patients", len(df))
-    col2.metric("Âge moyen", f"{df['age'].mean():.1f} ans")
-    col3.metric("% Crohn", f"{(df['maladie'].str.contains('Crohn')).mean()*100:.1f}%")
-    col4.metric("% RCH", f"{(df['maladie'].str.contains('RCH')).mean()*100:.1f}%")
-    col5.metric("% MICI indét.", f"{(df['maladie']=='MICI indéterminée').mean()*100:.1f}%")
+    col1.metric("👥 Patients", nb_patients)
+    col2.metric("Âge moyen", f"{age_moyen(cube):.1f} ans")
+    col3.metric("% Crohn", f"{par_maladie[noms_maladies.str.contains('Crohn')].sum()/nb_patients*100:.1f}%")
+    col4.metric("% RCH", f"{par_maladie[noms_maladies.str.contains('RCH')].sum()/nb_patients*100:.1f}%")
+    col5.metric("% MICI indét.", f"{par_maladie.get('MICI indéterminée', 0)/nb_patients*100:.1f}%")
 
     # Répartition démographique
     st.subheader("📊 Caractéristiques des patients")
@@ -56,9 +66,10 @@ if selected_page == "🏠 Accueil":
     
     with col1:
         # Répartition par sexe avec Plotly
+        par_sexe = compter(cube, ["sexe"])
         fig_sexe = px.pie(
-            df, 
-            names="sexe",
+            values=par_sexe.to_numpy(),
+            names=par_sexe.index.astype(str),
             hole=0.3,
             title="Répartition par sexe"
         )
@@ -66,17 +77,21 @@ if selected_page == "🏠 Accueil":
     
     with col2:
         # Distribution des âges avec Plotly
+        par_age = compter(cube, ["age"]).reset_index()
         fig_age = px.histogram(
-            df,
+            par_age,
             x="age",
+            y="patients",
             nbins=20,
-            title="Distribution des âges"
+            title="Distribution des âges",
+            labels={"patients": "count"}
         )
         st.plotly_chart(fig_age, use_container_width=True)
     
     # Répartition des maladies avec Plotly
     st.subheader("🦠 Types de MICI")
-    freq_maladie = df["maladie"].value_counts().reset_index()
+    freq_maladie = par_maladie.sort_values(ascending=False).rename("count").reset_index()
+    freq_maladie["maladie"] = freq_maladie["maladie"].astype(str)
     fig_maladies = px.bar(
         freq_maladie,
         x="maladie",
@@ -89,7 +104,8 @@ if selected_page == "🏠 Accueil":
 
     # Top traitements avec Plotly
     st.subheader("💊 Top 5 des traitements")
-    top_traitements = df["traitement"].value_counts().head(5).reset_index()
+    top_traitements = compter(cube, ["traitement"]).nlargest(5).rename("count").reset_index()
+    top_traitements["traitement"] = top_traitements["traitement"].astype(str)
     fig_traitements = px.bar(
         top_traitements,
         x="count",
@@ -111,15 +127,24 @@ if selected_page == "🏠 Accueil":
         """
     )
 
-elif selected_page == "💊 Traitements":
-    traitements(df)
+else:
+    # Module de la page importé seulement lorsqu'elle est sélectionnée
+    page = charger_page(selected_page)
+
+if selected_page == "💊 Traitements":
+    page(df, charger_cube())
 elif selected_page == "📊 Analyse comparative":
-    analyse_traitements(df)
+    page(charger_cube())
 elif selected_page == "⚠️ Pharmacovigilance":
-    pharmacovigilance(df)
+    page(df, charger_effets())
 elif selected_page == "🔍 Recherche patients":
-    recherche_patients(df)
+    page(df, charger_cube(), charger_index())
 elif selected_page == "🧠 Aide à la décision":
-    aide_decision(df)
+    page(charger_similarite())
 elif selected_page == "🔍 Extraction NLP":
-    extraction_nlp(df)
\ No newline at end of file
+    page(df, charger_index_termes())
+
+# Après le premier affichage, les autres pages sont importées en arrière-plan
+prechauffer()
+with st.sidebar.expander("⏱️ Import des pages"):
+    st.caption("  \n".join(f"{module} : {duree:.0f} ms" for module, duree in temps_imports().items()) or "Aucune page importée")
\ No newline at end of file
@@ -0,0 +1,49 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+@contextmanager
+def chronometrer(mesures, etape):
+    """
+    Mesure la durée du bloc et l'ajoute (en millisecondes) à mesures[etape].
+    """
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        mesures[etape] = mesures.get(etape, 0.0) + (time.perf_counter() - debut) * 1000
+
+
+def exporter_mesures(mesures, page):
+    """
+    Sérialise les mesures en JSON pour pouvoir suivre les régressions d'une version à l'autre.
+    """
+    return json.dumps({
+        "page": page,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "etapes_ms": {etape: round(duree, 3) for etape, duree in mesures.items()},
+        "total_ms": round(sum(mesures.values()), 3),
+    }, ensure_ascii=False, indent=2)
+
+
+def afficher_mesures(mesures, page):
+    """
+    Affiche le temps de chaque étape dans un expander, avec l'export JSON.
+    """
+    import streamlit as st
+    import pandas as pd
+
+    with st.expander("⏱️ Temps de calcul par étape"):
+        tableau = pd.DataFrame(
+            [{"Étape": etape, "Durée (ms)": round(duree, 2)} for etape, duree in mesures.items()]
+        )
+        st.dataframe(tableau, use_container_width=True, hide_index=True)
+        st.caption(f"Total : {sum(mesures.values()):.1f} ms")
+        st.download_button(
+            label="📥 Exporter les mesures (JSON)",
+            data=exporter_mesures(mesures, page),
+            file_name=f"mesures_{page}.json",
+            mime="application/json"
+        )
@@ -0,0 +1,137 @@
+import hashlib
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Dimensions du cube : chaque ligne du cube compte les patients partageant ces valeurs
+DIMENSIONS = ("age", "sexe", "maladie", "traitement", "reponse_traitement", "a_effet")
+
+# Dimensions du cube des effets secondaires (sans l'indicateur, implicite)
+DIMENSIONS_EFFETS = ("age", "sexe", "maladie", "traitement", "reponse_traitement", "effet")
+
+# comptes : effectifs par combinaison de DIMENSIONS (colonne "patients")
+# effets : signalements par combinaison de DIMENSIONS_EFFETS (colonne "signalements")
+# jeton : empreinte du contenu, qui identifie le cube (et les filtres appliqués)
+Cube = namedtuple("Cube", ["comptes", "effets", "jeton"])
+
+
+def _jeton(*parties):
+    empreinte = hashlib.sha256()
+    for partie in parties:
+        empreinte.update(partie if isinstance(partie, bytes) else repr(partie).encode("utf-8"))
+        empreinte.update(b"\0")
+    return empreinte.hexdigest()[:16]
+
+
+def _empreinte(table):
+    return pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes()
+
+
+def _agreger(table, dimensions, colonne):
+    agregat = table.groupby(list(dimensions), observed=True, sort=True)[colonne].sum().reset_index()
+    for dimension in dimensions:
+        if agregat[dimension].dtype == object:
+            agregat[dimension] = agregat[dimension].astype("category")
+    return agregat
+
+
+def _nouveau_cube(comptes, effets):
+    return Cube(comptes, effets, _jeton(_empreinte(comptes), _empreinte(effets)))
+
+
+def construire_cube(df, effets):
+    """
+    Agrège le dataset (une ligne par patient) et la table longue des effets
+    secondaires (indexée par la position du patient dans `df`).
+    """
+    positions = effets.index.to_numpy()
+    a_effet = np.zeros(len(df), dtype=bool)
+    a_effet[positions] = True
+
+    patients = df[list(DIMENSIONS[:-1])].assign(a_effet=a_effet, patients=1)
+    signalements = df[list(DIMENSIONS_EFFETS[:-1])].iloc[positions].reset_index(drop=True)
+    signalements = signalements.assign(effet=effets["effet"].to_numpy(), signalements=1)
+    return _nouveau_cube(
+        _agreger(patients, DIMENSIONS, "patients"),
+        _agreger(signalements, DIMENSIONS_EFFETS, "signalements"),
+    )
+
+
+def fusionner_cubes(*cubes):
+    """
+    Cube équivalent à celui de l'union des lignes des cubes fournis.
+    """
+    comptes = pd.concat([cube.comptes for cube in cubes], ignore_index=True)
+    effets = pd.concat([cube.effets for cube in cubes], ignore_index=True)
+    return _nouveau_cube(
+        _agreger(comptes, DIMENSIONS, "patients"),
+        _agreger(effets, DIMENSIONS_EFFETS, "signalements"),
+    )
+
+
+def ajouter_lignes(cube, df_nouvelles, effets_nouveaux):
+    """
+    Met à jour le cube avec des patients ajoutés, sans réagréger le dataset complet.
+    """
+    return fusionner_cubes(cube, construire_cube(df_nouvelles, effets_nouveaux))
+
+
+def filtrer_cube(cube, age=None, **valeurs):
+    """
+    Tranche du cube correspondant aux filtres : `age` est un intervalle (min, max)
+    inclusif, les autres dimensions une valeur ou une liste de valeurs ; None
+    signifie « pas de filtre ».
+    """
+    criteres = {
+        dimension: tuple(sorted(valeur)) if isinstance(valeur, (list, set, frozenset)) else valeur
+        for dimension, valeur in valeurs.items() if valeur is not None
+    }
+    if age is not None:
+        criteres["age"] = tuple(age)
+    if not criteres:
+        return cube
+
+    def masque(table):
+        garder = np.ones(len(table), dtype=bool)
+        for dimension, valeur in criteres.items():
+            if dimension not in table:
+                # Les signalements n'existent que pour les patients ayant un effet (a_effet)
+                garder &= bool(valeur)
+                continue
+            colonne = table[dimension]
+            if dimension == "age":
+                garder &= ((colonne >= valeur[0]) & (colonne <= valeur[1])).to_numpy()
+            elif isinstance(valeur, tuple):
+                garder &= colonne.isin(valeur).to_numpy()
+            else:
+                garder &= (colonne == valeur).to_numpy()
+        return garder
+
+    return Cube(
+        cube.comptes[masque(cube.comptes)],
+        cube.effets[masque(cube.effets)],
+        _jeton(cube.jeton, sorted(criteres.items())),
+    )
+
+
+def compter(cube, dimensions):
+    """
+    Nombre de patients par valeur de la ou des dimensions.
+    """
+    return cube.comptes.groupby(list(dimensions), observed=True)["patients"].sum()
+
+
+def compter_effets(cube, dimensions=("effet",)):
+    """
+    Nombre de signalements d'effets secondaires par valeur de la ou des dimensions.
+    """
+    return cube.effets.groupby(list(dimensions), observed=True)["signalements"].sum()
+
+
+def nombre_patients(cube):
+    return int(cube.comptes["patients"].sum())
+
+
+def age_moyen(cube):
+    total = nombre_patients(cube)
+    return float((cube.comptes["age"] * cube.comptes["patients"]).sum() / total) if total else 0.0
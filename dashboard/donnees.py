@@ -0,0 +1,388 @@
+import argparse
+import io
+import os
+import pandas as pd
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import streamlit as st
+from cube_cohorte import DIMENSIONS, ajouter_lignes, construire_cube, fusionner_cubes
+from index_recherche import COLONNES_INDEXEES, construire_index
+from index_termes import COLONNES_TERMES, construire_index_termes
+from nlp_lexiques import obtenir_matcher
+from similarite_patients import COLONNES_SIMILARITE, construire_similarite
+
+CHEMIN_DATASET = "data/dataset.csv"
+CHEMIN_PARQUET = "data/dataset.parquet"
+
+# Au-delà de cette taille de fichier (en Mo, modifiable par la variable
+# d'environnement), le cube est agrégé bloc par bloc sans charger le dataset
+SEUIL_AGREGATION_PAR_BLOCS_MO = int(os.environ.get("MEDINLP_SEUIL_BLOCS_MO", 1024))
+
+# Nombre de lignes lues à la fois en agrégation par blocs
+TAILLE_BLOC = 500_000
+
+# Octets relus à la fin de l'ancienne version d'un CSV pour vérifier qu'il n'a
+# reçu que des lignes ajoutées (et non une réécriture)
+TAILLE_EMPREINTE_FIN = 65_536
+
+# Colonnes à faible cardinalité, chargées en catégories : les filtres et les
+# regroupements travaillent alors sur des codes entiers plutôt que sur des chaînes.
+COLONNES_CATEGORIELLES = ("sexe", "maladie", "traitement", "reponse_traitement")
+
+# Copy-on-write : les pages peuvent filtrer ou modifier leurs sous-ensembles
+# sans jamais altérer le DataFrame partagé, donc sans df.copy() préalable.
+pd.set_option("mode.copy_on_write", True)
+
+
+def signature_fichier(chemin):
+    """
+    Date de modification et taille du fichier : la signature change dès que le fichier est réécrit.
+    """
+    infos = os.stat(chemin)
+    return infos.st_mtime_ns, infos.st_size
+
+
+def convertir_en_parquet(chemin_csv=CHEMIN_DATASET, chemin_parquet=CHEMIN_PARQUET):
+    """
+    Convertit le dataset CSV au format Parquet (stockage en colonnes).
+    """
+    # Cellules vides lues comme manquantes, comme avec pandas.read_csv
+    options = pa_csv.ConvertOptions(strings_can_be_null=True)
+    table = pa_csv.read_csv(chemin_csv, convert_options=options)
+    pq.write_table(table, chemin_parquet)
+    return chemin_parquet
+
+
+def choisir_source(chemin_csv=CHEMIN_DATASET, chemin_parquet=CHEMIN_PARQUET):
+    """
+    Utilise la version Parquet si elle existe et n'est pas plus ancienne que le CSV.
+    """
+    if os.path.exists(chemin_parquet) and (
+        not os.path.exists(chemin_csv) or os.stat(chemin_parquet).st_mtime_ns >= os.stat(chemin_csv).st_mtime_ns
+    ):
+        return chemin_parquet
+    return chemin_csv
+
+
+class _Tranche(io.RawIOBase):
+    """
+    Fichier binaire en lecture limité aux octets [debut, fin[ : les lignes
+    écrites au-delà de `fin` pendant la lecture sont ignorées.
+    """
+
+    def __init__(self, chemin, debut, fin):
+        self.fichier = open(chemin, "rb")
+        self.fichier.seek(debut)
+        self.restant = fin - debut
+
+    def readable(self):
+        return True
+
+    def readinto(self, tampon):
+        if self.restant <= 0:
+            return 0
+        lus = self.fichier.readinto(memoryview(tampon)[:min(len(tampon), self.restant)])
+        self.restant -= lus
+        return lus
+
+    def close(self):
+        self.fichier.close()
+        super().close()
+
+
+def ouvrir_tranche(chemin, debut, fin):
+    return io.BufferedReader(_Tranche(chemin, debut, fin))
+
+
+def fin_lignes_completes(chemin, taille):
+    """
+    Position qui suit le dernier saut de ligne parmi les `taille` premiers
+    octets du fichier : une ligne en cours d'écriture n'est pas lue.
+    """
+    with open(chemin, "rb") as fichier:
+        fin = taille
+        while fin > 0:
+            debut = max(fin - TAILLE_EMPREINTE_FIN, 0)
+            fichier.seek(debut)
+            position = fichier.read(fin - debut).rfind(b"\n")
+            if position >= 0:
+                return debut + position + 1
+            fin = debut
+    return 0
+
+
+def lire_dataset(chemin, colonnes=None, fin=None):
+    """
+    Lit le dataset (CSV ou Parquet), éventuellement limité à certaines colonnes.
+    Pour un CSV, `fin` limite la lecture aux octets qui la précèdent.
+    """
+    if chemin.endswith(".parquet"):
+        # Lecture en mémoire mappée, limitée aux colonnes demandées
+        noms = pq.read_schema(chemin).names
+        if colonnes is not None:
+            noms = [nom for nom in noms if nom in colonnes]
+        table = pq.read_table(
+            chemin, columns=noms, memory_map=True,
+            read_dictionary=[nom for nom in noms if nom in COLONNES_CATEGORIELLES],
+        )
+        return table.to_pandas()
+    with ouvrir_tranche(chemin, 0, os.stat(chemin).st_size if fin is None else fin) as fichier:
+        return pd.read_csv(
+            fichier,
+            usecols=colonnes and (lambda nom: nom in colonnes),
+            dtype={nom: "category" for nom in COLONNES_CATEGORIELLES},
+        )
+
+
+def lire_par_blocs(chemin, colonnes=None, taille_bloc=TAILLE_BLOC, fin=None):
+    """
+    Parcourt le dataset (CSV ou Parquet) par blocs de `taille_bloc` lignes,
+    chacun renvoyé comme un DataFrame indexé à partir de 0. Pour un CSV, `fin`
+    limite la lecture aux octets qui la précèdent.
+    """
+    if chemin.endswith(".parquet"):
+        fichier = pq.ParquetFile(chemin, memory_map=True, read_dictionary=list(COLONNES_CATEGORIELLES))
+        noms = fichier.schema_arrow.names
+        if colonnes is not None:
+            noms = [nom for nom in noms if nom in colonnes]
+        for lot in fichier.iter_batches(batch_size=taille_bloc, columns=noms):
+            yield lot.to_pandas()
+        return
+    with ouvrir_tranche(chemin, 0, os.stat(chemin).st_size if fin is None else fin) as fichier:
+        blocs = pd.read_csv(
+            fichier,
+            usecols=colonnes and (lambda nom: nom in colonnes),
+            dtype={nom: "category" for nom in COLONNES_CATEGORIELLES},
+            chunksize=taille_bloc,
+        )
+        with blocs:
+            for bloc in blocs:
+                yield bloc.reset_index(drop=True)
+
+
+def lire_ajouts_csv(chemin, debut, fin, colonnes=None, taille_bloc=TAILLE_BLOC):
+    """
+    Parcourt par blocs les lignes d'un CSV situées entre les octets `debut` et
+    `fin` (lignes ajoutées en fin de fichier depuis une lecture précédente).
+    """
+    entete = pd.read_csv(chemin, nrows=0).columns
+    with ouvrir_tranche(chemin, debut, fin) as fichier:
+        blocs = pd.read_csv(
+            fichier,
+            header=None,
+            names=entete,
+            usecols=colonnes and (lambda nom: nom in colonnes),
+            dtype={nom: "category" for nom in COLONNES_CATEGORIELLES},
+            chunksize=taille_bloc,
+        )
+        with blocs:
+            for bloc in blocs:
+                yield bloc.reset_index(drop=True)
+
+
+def agreger_par_blocs(chemin, taille_bloc=TAILLE_BLOC, fin=None):
+    """
+    Construit le cube de la cohorte en un seul parcours du fichier : chaque bloc
+    est agrégé puis fusionné au cube partiel, la mémoire utilisée ne dépend donc
+    pas du nombre de lignes du dataset.
+    """
+    cube = None
+    for bloc in lire_par_blocs(chemin, DIMENSIONS[:-1] + ("effets_secondaires",), taille_bloc, fin):
+        partiel = construire_cube(bloc, exploser_effets(bloc))
+        cube = partiel if cube is None else fusionner_cubes(cube, partiel)
+    return cube
+
+
+def _empreinte_fin(chemin, taille):
+    """
+    Derniers octets des `taille` premiers octets du fichier.
+    """
+    with open(chemin, "rb") as fichier:
+        fichier.seek(max(taille - TAILLE_EMPREINTE_FIN, 0))
+        return fichier.read(min(taille, TAILLE_EMPREINTE_FIN))
+
+
+def completer_cube(chemin, cube, taille_precedente, empreinte_precedente, fin):
+    """
+    Si le CSV n'a reçu que des lignes ajoutées depuis que ses `taille_precedente`
+    premiers octets ont été agrégés, renvoie le cube mis à jour avec les lignes
+    situées jusqu'à l'octet `fin` ; sinon None (le cube doit être reconstruit).
+    """
+    if fin <= taille_precedente:
+        return None
+    # L'ancienne version doit se terminer par une ligne complète et être inchangée
+    if not empreinte_precedente.endswith(b"\n") or _empreinte_fin(chemin, taille_precedente) != empreinte_precedente:
+        return None
+    for bloc in lire_ajouts_csv(chemin, taille_precedente, fin, DIMENSIONS[:-1] + ("effets_secondaires",)):
+        cube = ajouter_lignes(cube, bloc, exploser_effets(bloc))
+    return cube
+
+
+def agregation_par_blocs(chemin):
+    """
+    Indique si le dataset est assez volumineux pour être agrégé par blocs.
+    """
+    return os.stat(chemin).st_size > SEUIL_AGREGATION_PAR_BLOCS_MO * 1_000_000
+
+
+@st.cache_resource(show_spinner="Chargement des données...", max_entries=1)
+def _lire_csv(chemin, signature):
+    # Lecture arrêtée à la taille de la signature (dernière ligne complète) :
+    # le DataFrame correspond exactement à cette version du fichier
+    return lire_dataset(chemin, fin=fin_lignes_completes(chemin, signature[1]))
+
+
+# Projections Parquet déjà lues : (colonnes demandées) -> DataFrame, pour la
+# seule version (chemin, signature) courante du fichier
+@st.cache_resource(show_spinner="Chargement des données...", max_entries=16)
+def _lire_colonnes_parquet(chemin, signature, colonnes):
+    return lire_dataset(chemin, colonnes)
+
+
+_version_parquet = None
+
+
+def _lire_dataset(chemin, signature, colonnes):
+    """
+    Le CSV n'est analysé qu'une fois (toutes les colonnes) et chaque page en
+    reçoit une sélection de colonnes, sans copie grâce au copy-on-write. Le
+    Parquet, lui, ne lit que les colonnes demandées ; les projections d'une
+    version précédente du fichier sont oubliées dès qu'il change.
+    """
+    global _version_parquet
+    if chemin.endswith(".parquet"):
+        if _version_parquet is not None and _version_parquet != (chemin, signature):
+            _lire_colonnes_parquet.clear()
+        _version_parquet = (chemin, signature)
+        return _lire_colonnes_parquet(chemin, signature, colonnes)
+    df = _lire_csv(chemin, signature)
+    if colonnes is None:
+        return df
+    return df[[nom for nom in df.columns if nom in colonnes]]
+
+
+def charger_dataset(colonnes=None, chemin=None):
+    """
+    Renvoie le dataset (ou seulement les colonnes demandées), lu une seule fois
+    et partagé entre toutes les sessions. Il est relu automatiquement si le
+    fichier change sur le disque. Le DataFrame renvoyé est partagé : il ne doit
+    pas être modifié en place.
+    """
+    chemin = chemin or choisir_source()
+    colonnes = tuple(colonnes) if colonnes is not None else None
+    return _lire_dataset(chemin, signature_fichier(chemin), colonnes)
+
+
+def exploser_effets(df):
+    """
+    Table longue des effets secondaires : une ligne par (patient, effet), indexée
+    comme le DataFrame d'origine pour pouvoir être filtrée avec lui.
+    """
+    effets = df["effets_secondaires"].dropna()
+    effets = effets.str.split(",").explode().str.strip()
+    effets = effets[effets != ""]
+    return pd.DataFrame({"effet": effets.astype("category")})
+
+
+@st.cache_resource(show_spinner="Préparation des effets secondaires...", max_entries=2)
+def _lire_effets(chemin, signature):
+    return exploser_effets(_lire_dataset(chemin, signature, ("effets_secondaires",)))
+
+
+def charger_effets(chemin=None):
+    """
+    Renvoie la table longue des effets secondaires, découpée une seule fois
+    au chargement du dataset et partagée entre toutes les sessions.
+    """
+    chemin = chemin or choisir_source()
+    return _lire_effets(chemin, signature_fichier(chemin))
+
+
+# Dernier cube construit par CSV : chemin -> (octets agrégés, empreinte de leur fin, cube)
+_DERNIERS_CUBES = {}
+
+
+@st.cache_resource(show_spinner="Agrégation de la cohorte...", max_entries=2)
+def _construire_cube(chemin, signature):
+    if chemin.endswith(".parquet"):
+        if agregation_par_blocs(chemin):
+            return agreger_par_blocs(chemin)
+        df = _lire_dataset(chemin, signature, DIMENSIONS[:-1])
+        return construire_cube(df, _lire_effets(chemin, signature))
+    # Octets effectivement agrégés : les lignes complètes de cette version du
+    # fichier, même si d'autres lignes sont ajoutées pendant la lecture
+    fin = fin_lignes_completes(chemin, signature[1])
+    cube = None
+    precedent = _DERNIERS_CUBES.get(chemin)
+    if precedent is not None:
+        taille, empreinte, cube_precedent = precedent
+        cube = completer_cube(chemin, cube_precedent, taille, empreinte, fin)
+    if cube is None and agregation_par_blocs(chemin):
+        cube = agreger_par_blocs(chemin, fin=fin)
+    elif cube is None:
+        df = _lire_dataset(chemin, signature, DIMENSIONS[:-1])
+        cube = construire_cube(df, _lire_effets(chemin, signature))
+    _DERNIERS_CUBES[chemin] = (fin, _empreinte_fin(chemin, fin), cube)
+    return cube
+
+
+def charger_cube(chemin=None):
+    """
+    Renvoie le cube de la cohorte (effectifs agrégés), construit une seule fois
+    au chargement du dataset et partagé entre toutes les sessions. Un dataset
+    plus gros que SEUIL_AGREGATION_PAR_BLOCS_MO est agrégé bloc par bloc.
+    Lorsque des lignes sont ajoutées à la fin du CSV, seules ces lignes sont
+    agrégées et fusionnées au cube précédent.
+    """
+    chemin = chemin or choisir_source()
+    return _construire_cube(chemin, signature_fichier(chemin))
+
+
+@st.cache_resource(show_spinner="Indexation des patients...", max_entries=2)
+def _construire_index(chemin, signature):
+    return construire_index(_lire_dataset(chemin, signature, ("age",) + COLONNES_INDEXEES))
+
+
+def charger_index(chemin=None):
+    """
+    Renvoie l'index de recherche des patients (bitsets et âges triés),
+    construit une seule fois au chargement du dataset.
+    """
+    chemin = chemin or choisir_source()
+    return _construire_index(chemin, signature_fichier(chemin))
+
+
+@st.cache_resource(show_spinner="Indexation des profils patients...", max_entries=2)
+def _construire_similarite(chemin, signature):
+    return construire_similarite(_lire_dataset(chemin, signature, COLONNES_SIMILARITE))
+
+
+def charger_similarite(chemin=None):
+    """
+    Renvoie l'index des plus proches voisins (profils patients regroupés en
+    cellules), construit une seule fois au chargement du dataset.
+    """
+    chemin = chemin or choisir_source()
+    return _construire_similarite(chemin, signature_fichier(chemin))
+
+
+@st.cache_resource(show_spinner="Indexation des termes de la cohorte...", max_entries=2)
+def _construire_index_termes(chemin, signature, version_lexiques):
+    return construire_index_termes(_lire_dataset(chemin, signature, tuple(COLONNES_TERMES)), obtenir_matcher())
+
+
+def charger_index_termes(chemin=None):
+    """
+    Renvoie l'index inversé des maladies et traitements (identifiants canoniques
+    des lexiques -> patients), reconstruit si le dataset ou les lexiques changent.
+    """
+    chemin = chemin or choisir_source()
+    return _construire_index_termes(chemin, signature_fichier(chemin), obtenir_matcher().version)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion du dataset CSV en Parquet")
+    parser.add_argument("csv", nargs="?", default=CHEMIN_DATASET)
+    parser.add_argument("parquet", nargs="?", default=CHEMIN_PARQUET)
+    args = parser.parse_args()
+    print(f"Dataset converti : {convertir_en_parquet(args.csv, args.parquet)}")
@@ -0,0 +1,130 @@
+import html
+import os
+import tempfile
+import threading
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from index_recherche import blocs_resultat, compter_resultats
+
+# Nombre de patients indexés parcourus à la fois lors d'un export
+TAILLE_BLOC = 100_000
+
+# Format -> (extension du fichier, type MIME)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Rapport HTML": ("html", "text/html"),
+}
+
+# Nombre maximal de fichiers d'export conservés dans le dossier temporaire :
+# au-delà, les plus anciens (sessions terminées sans téléchargement) sont supprimés
+NB_EXPORTS_MAX = 8
+
+# Dossier temporaire propre au processus, créé à l'import et supprimé à sa
+# fermeture : toutes les sessions (threads) y écrivent
+_DOSSIER = tempfile.TemporaryDirectory(prefix="medinlp_exports_")
+_VERROU = threading.Lock()
+
+
+def supprimer_export(chemin):
+    try:
+        os.remove(chemin)
+    except OSError:
+        pass
+
+
+def _date_modification(chemin):
+    # Un fichier supprimé entre-temps par une autre session passe en premier (déjà évincé)
+    try:
+        return os.stat(chemin).st_mtime_ns
+    except FileNotFoundError:
+        return -1
+
+
+def _nouveau_fichier(extension):
+    with _VERROU:
+        anciens = sorted(
+            (os.path.join(_DOSSIER.name, nom) for nom in os.listdir(_DOSSIER.name)),
+            key=_date_modification,
+        )
+        for chemin in anciens[:max(len(anciens) - NB_EXPORTS_MAX + 1, 0)]:
+            supprimer_export(chemin)
+        descripteur, chemin = tempfile.mkstemp(suffix=f".{extension}", dir=_DOSSIER.name)
+    os.close(descripteur)
+    return chemin
+
+
+def _blocs(df, resultat, colonnes, progression):
+    for positions in blocs_resultat(resultat, TAILLE_BLOC):
+        yield df.iloc[positions] if colonnes is None else df.iloc[positions][colonnes]
+        if progression is not None:
+            progression(min(float(positions[-1] + 1) / len(df), 1.0))
+
+
+def ecrire_csv(blocs, chemin):
+    with open(chemin, "w", encoding="utf-8-sig", newline="") as fichier:
+        for numero, bloc in enumerate(blocs):
+            bloc.to_csv(fichier, index=False, header=numero == 0)
+
+
+def ecrire_parquet(blocs, chemin):
+    ecrivain = None
+    try:
+        for bloc in blocs:
+            table = pa.Table.from_pandas(bloc, preserve_index=False)
+            if ecrivain is None:
+                ecrivain = pq.ParquetWriter(chemin, table.schema)
+            ecrivain.write_table(table)
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+
+
+def ecrire_html(blocs, chemin, nb_resultats, colonnes):
+    with open(chemin, "w", encoding="utf-8") as fichier:
+        fichier.write(
+            f"""<meta charset="utf-8">
+        <h2>Rapport de recherche patients - MediNLP</h2>
+        <p>Date d'extraction : {pd.Timestamp.now().strftime('%d/%m/%Y')}</p>
+        <p><b>{nb_resultats} patients correspondent aux critères</b></p>
+        <hr>
+        <table border="1" class="dataframe">
+        <thead><tr>{"".join(f"<th>{html.escape(colonne)}</th>" for colonne in colonnes)}</tr></thead>
+        <tbody>
+"""
+        )
+        for bloc in blocs:
+            valeurs = bloc.astype(object).where(bloc.notna(), "")
+            for ligne in valeurs.itertuples(index=False):
+                fichier.write("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in ligne) + "</tr>\n")
+        fichier.write(
+            """        </tbody>
+        </table>
+        <hr>
+        <p><i>Dashboard MediNLP - Projet FORECAST MICI</i></p>
+"""
+        )
+
+
+def exporter_resultats(df, resultat, format_export, colonnes=None, progression=None):
+    """
+    Écrit les patients du bitset `resultat` dans un fichier temporaire au format
+    demandé (voir FORMATS), bloc par bloc : la mémoire utilisée ne dépend pas du
+    nombre de patients exportés. `progression` reçoit l'avancement (entre 0 et 1).
+    Renvoie le chemin du fichier.
+    """
+    extension, _ = FORMATS[format_export]
+    chemin = _nouveau_fichier(extension)
+    if format_export == "Rapport HTML":
+        colonnes = list(colonnes or df.columns)
+    blocs = _blocs(df, resultat, colonnes, progression)
+    if format_export == "CSV":
+        ecrire_csv(blocs, chemin)
+    elif format_export == "Parquet":
+        ecrire_parquet(blocs, chemin)
+    else:
+        ecrire_html(blocs, chemin, compter_resultats(resultat), colonnes)
+    if progression is not None:
+        progression(1.0)
+    return chemin
@@ -0,0 +1,148 @@
+"""
+Extraction NLP en lot sur un corpus de comptes-rendus.
+
+Exemple :
+    python dashboard/extraction_batch.py data/mini_dataset.csv resultats.parquet
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from nlp_cache import DOSSIER_CACHE, analyser_texte_cache
+
+# Schéma de la table de sortie : une ligne par compte-rendu
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("maladies", pa.list_(pa.string())),
+    ("traitements", pa.list_(pa.string())),
+    ("symptomes", pa.list_(pa.string())),
+    ("entites", pa.list_(pa.struct([
+        ("categorie", pa.string()),
+        ("debut", pa.int64()),
+        ("fin", pa.int64()),
+        ("forme", pa.string()),
+        ("terme", pa.string()),
+    ]))),
+    ("score_severite", pa.float64()),
+    ("niveau_severite", pa.string()),
+    ("dates", pa.list_(pa.string())),
+    ("evenements", pa.list_(pa.string())),
+])
+
+
+def lire_comptes_rendus(chemin, colonne_texte="texte_compte_rendu", colonne_id="id", taille_lot=256):
+    """
+    Lit un fichier CSV ou JSONL par lots de (id, texte) sans le charger entièrement en mémoire.
+    """
+    if chemin.endswith(".jsonl"):
+        lot = []
+        with open(chemin, encoding="utf-8") as fichier:
+            for ligne in fichier:
+                if not ligne.strip():
+                    continue
+                enregistrement = json.loads(ligne)
+                lot.append((str(enregistrement[colonne_id]), enregistrement.get(colonne_texte) or ""))
+                if len(lot) == taille_lot:
+                    yield lot
+                    lot = []
+        if lot:
+            yield lot
+    else:
+        lecteur = pd.read_csv(
+            chemin,
+            usecols=[colonne_id, colonne_texte],
+            dtype={colonne_id: str, colonne_texte: str},
+            keep_default_na=False,
+            chunksize=taille_lot,
+        )
+        for morceau in lecteur:
+            yield list(zip(morceau[colonne_id], morceau[colonne_texte]))
+
+
+def analyser_lot(lot, dossier_cache=None):
+    """
+    Analyse un lot de comptes-rendus et renvoie les lignes de la table de sortie.
+    Les comptes-rendus identiques déjà analysés sont servis par le cache.
+    """
+    lignes = []
+    for identifiant, texte in lot:
+        analyse = analyser_texte_cache(texte, dossier=dossier_cache)
+        lignes.append({
+            "id": identifiant,
+            "maladies": analyse["maladies"],
+            "traitements": analyse["traitements"],
+            "symptomes": analyse["symptomes"],
+            "entites": [entite._asdict() for entite in analyse["entites"]],
+            "score_severite": analyse["score_severite"],
+            "niveau_severite": analyse["niveau_severite"],
+            "dates": [evenement["date_iso"] for evenement in analyse["chronologie"]],
+            "evenements": [evenement["Événement"] for evenement in analyse["chronologie"]],
+        })
+    return lignes
+
+
+def extraire_corpus(entree, sortie, colonne_texte="texte_compte_rendu", colonne_id="id",
+                    taille_lot=256, workers=None, dossier_cache=None):
+    """
+    Analyse un corpus complet en répartissant les lots sur un pool de processus
+    et écrit les résultats au fil de l'eau dans un fichier Parquet.
+
+    Le nombre de lots en cours est borné pour que la mémoire ne dépende pas
+    de la taille du corpus. Avec `dossier_cache`, les analyses sont aussi
+    partagées sur disque entre les processus et d'une exécution à l'autre.
+    Renvoie le nombre de documents et le débit (docs/s).
+    """
+    workers = workers or os.cpu_count() or 1
+    debut = time.perf_counter()
+    nb_documents = 0
+    en_cours = deque()
+
+    def ecrire(futur):
+        lignes = futur.result()
+        writer.write_table(pa.Table.from_pylist(lignes, schema=SCHEMA))
+        return len(lignes)
+
+    with pq.ParquetWriter(sortie, SCHEMA) as writer, ProcessPoolExecutor(max_workers=workers) as pool:
+        for lot in lire_comptes_rendus(entree, colonne_texte, colonne_id, taille_lot):
+            en_cours.append(pool.submit(analyser_lot, lot, dossier_cache))
+            # Les lots sont écrits dans l'ordre de lecture dès que la file est pleine
+            if len(en_cours) >= 2 * workers:
+                nb_documents += ecrire(en_cours.popleft())
+        while en_cours:
+            nb_documents += ecrire(en_cours.popleft())
+
+    duree = time.perf_counter() - debut
+    debit = nb_documents / duree if duree > 0 else 0.0
+    return {"documents": nb_documents, "duree_s": duree, "docs_par_s": debit}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction NLP en lot vers Parquet")
+    parser.add_argument("entree", help="Fichier CSV ou JSONL de comptes-rendus")
+    parser.add_argument("sortie", help="Fichier Parquet de sortie")
+    parser.add_argument("--colonne-texte", default="texte_compte_rendu")
+    parser.add_argument("--colonne-id", default="id")
+    parser.add_argument("--taille-lot", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=DOSSIER_CACHE, help="Dossier du cache d'analyses sur disque")
+    args = parser.parse_args()
+
+    stats = extraire_corpus(
+        args.entree, args.sortie,
+        colonne_texte=args.colonne_texte,
+        colonne_id=args.colonne_id,
+        taille_lot=args.taille_lot,
+        workers=args.workers,
+        dossier_cache=args.cache,
+    )
+    print(
+        f"{stats['documents']} comptes-rendus analysés en {stats['duree_s']:.2f} s "
+        f"({stats['docs_par_s']:.1f} docs/s)"
+    )
@@ -1,11 +1,15 @@
 import streamlit as st
 import pandas as pd
-import re
 import random
 import numpy as np
 from collections import Counter
+from chronometre import afficher_mesures, chronometrer
+from nlp_entites import surligner_html
+from nlp_cache import analyser_texte_cache
+from nlp_pipeline import generer_resume
+from index_termes import patients_similaires, termes_entites
 
-def extraction_nlp(df):
+def extraction_nlp(df, index_termes):
     st.title("🔍 Extraction NLP de comptes-rendus médicaux")
     st.write(
         "Cette page permet d'analyser des comptes-rendus médicaux en texte libre "
@@ -17,24 +21,6 @@ def extraction_nlp(df):
         "en utilisant des dictionnaires médicaux et des expressions régulières."
     )
 
-    dictionnaire_mici = [
-        "maladie de Crohn", "Crohn", "RCH", "rectocolite hémorragique", 
-        "colite ulcéreuse", "MICI", "maladie inflammatoire chronique intestinale",
-        "iléite", "colite", "entérite"
-    ]
-    dictionnaire_traitements = [
-        "Infliximab", "Remicade", "Adalimumab", "Humira", "Vedolizumab", "Entyvio",
-        "Ustekinumab", "Stelara", "Azathioprine", "Imurel", "Mesalazine", "Pentasa",
-        "corticoïdes", "prednisone", "cortisone", "méthotrexate", "anti-TNF",
-        "Methylprednisolone"
-    ]
-    dictionnaire_symptomes = [
-        "diarrhée", "douleur abdominale", "sang dans les selles", "fatigue",
-        "perte de poids", "fièvre", "douleurs articulaires", "lésions cutanées",
-        "nausées", "vomissements", "crampes", "ballonnements", "asthénie", 
-        "saignement", "ulcération"
-    ]
-
     st.subheader("📝 Saisie du compte-rendu médical")
     exemple_selected = st.checkbox("Utiliser un exemple pré-rempli")
     if exemple_selected:
@@ -116,28 +102,25 @@ def extraction_nlp(df):
             placeholder="Exemple: Patient de 35 ans suivi pour une maladie de Crohn avec traitement par Adalimumab..."
         )
 
+    # Le texte analysé est conservé dans la session pour que les résultats restent
+    # affichés lors des interactions suivantes (formulaire, boutons...)
     if st.button("Analyser le texte", use_container_width=True):
-        if not text_input:
+        st.session_state["texte_analyse"] = text_input
+    texte_analyse = st.session_state.get("texte_analyse")
+
+    if texte_analyse is not None:
+        if not texte_analyse:
             st.error("Veuillez entrer un texte à analyser")
-        else:
+        elif texte_analyse == text_input:
+            mesures = {}
             with st.spinner("Analyse en cours..."):
-                def extraire_entites(texte, dictionnaire):
-                    texte_normalise = re.sub(r'\s+', ' ', texte).lower()
-                    original_normalise = re.sub(r'\s+', ' ', texte)
-                    entites_trouvees = []
-                    for terme in dictionnaire:
-                        terme_lower = terme.lower()
-                        pattern = r'\b' + re.escape(terme_lower) + r'\b'
-                        for match in re.finditer(pattern, texte_normalise):
-                            debut, fin = match.span()
-                            terme_original = original_normalise[debut:fin]
-                            entites_trouvees.append(terme_original)
-                    return list(set(entites_trouvees))
-                mici_trouvees = extraire_entites(text_input, dictionnaire_mici)
-                traitements_trouves = extraire_entites(text_input, dictionnaire_traitements)
-                symptomes_trouves = extraire_entites(text_input, dictionnaire_symptomes)
-                import time
-                time.sleep(1.5)
+                analyse = analyser_texte_cache(text_input, mesures=mesures)
+                entites = analyse["entites"]
+                mici_trouvees = analyse["maladies"]
+                traitements_trouves = analyse["traitements"]
+                symptomes_trouves = analyse["symptomes"]
+                score_normalise = analyse["score_severite"]
+                niveau_texte = analyse["niveau_severite"]
 
             st.subheader("✅ Résultats de l'extraction")
             col1, col2, col3 = st.columns(3)
@@ -152,7 +135,12 @@ def extraction_nlp(df):
                 st.write("**Traitements identifiés:**")
                 if traitements_trouves:
                     for traitement in traitements_trouves:
-                        st.success(f"• {traitement}")
+                        # Les noms commerciaux sont rattachés à leur molécule (ex: Remicade → Infliximab)
+                        molecule = analyse["libelles"][traitement]
+                        if molecule.lower() != traitement.lower():
+                            st.success(f"• {traitement} → {molecule}")
+                        else:
+                            st.success(f"• {traitement}")
                 else:
                     st.info("Aucun traitement identifié")
             with col3:
@@ -164,17 +152,6 @@ def extraction_nlp(df):
                     st.info("Aucun symptôme identifié")
 
             st.subheader("🚨 Évaluation de la sévérité")
-            score_severite = 0
-            symptomes_graves = ["sang dans les selles", "diarrhée", "perte de poids", "saignement"]
-            symptomes_moderes = ["fatigue", "douleur abdominale", "ulcération", "asthénie"]
-            for symptome in symptomes_trouves:
-                symptome_lower = symptome.lower()
-                if any(grave in symptome_lower for grave in symptomes_graves):
-                    score_severite += 2
-                elif any(modere in symptome_lower for modere in symptomes_moderes):
-                    score_severite += 1
-            score_normalise = min(score_severite / 8, 1.0)
-            niveau_texte = "Léger" if score_normalise < 0.33 else "Modéré" if score_normalise < 0.66 else "Sévère"
             col1, col2 = st.columns([3, 1])
             with col1:
                 st.progress(score_normalise)
@@ -182,31 +159,10 @@ def extraction_nlp(df):
                 st.write(f"**{niveau_texte}**")
             st.write(f"Score calculé sur la base de {len(symptomes_trouves)} symptômes détectés.")
 
-            # Surlignage robuste (fonctionne même avec l'exemple)
+            # Surlignage en un seul parcours à partir des positions des entités
             st.subheader("📑 Texte analysé avec entités")
-            texte_affichage = text_input
-            for mici in sorted(mici_trouvees, key=len, reverse=True):
-                texte_affichage = re.sub(
-                    r'\b' + re.escape(mici) + r'\b',
-                    f'<span style="background-color: #ffe066; color: #222; border-radius:3px; padding: 0 3px;">{mici}</span>',
-                    texte_affichage,
-                    flags=re.IGNORECASE
-                )
-            for traitement in sorted(traitements_trouves, key=len, reverse=True):
-                texte_affichage = re.sub(
-                    r'\b' + re.escape(traitement) + r'\b',
-                    f'<span style="background-color: #b2f2ff; color: #222; border-radius:3px; padding: 0 3px;">{traitement}</span>',
-                    texte_affichage,
-                    flags=re.IGNORECASE
-                )
-            for symptome in sorted(symptomes_trouves, key=len, reverse=True):
-                texte_affichage = re.sub(
-                    r'\b' + re.escape(symptome) + r'\b',
-                    f'<span style="background-color: #d3f9d8; color: #222; border-radius:3px; padding: 0 3px;">{symptome}</span>',
-                    texte_affichage,
-                    flags=re.IGNORECASE
-                )
-            texte_html = texte_affichage.replace('\n', '<br>')
+            with chronometrer(mesures, "surlignage"):
+                texte_html = surligner_html(text_input, entites)
             legende_html = """
             <div style="margin-bottom: 10px;">
                 <span style="background-color: #ffe066; color: #222; padding: 2px 5px; border-radius: 3px;">MICI</span>
@@ -242,68 +198,35 @@ def extraction_nlp(df):
                     st.caption("Passez la souris sur les cases pour voir les scores.")
 
             st.subheader("📋 Résumé automatique")
-            maladies_str = ", ".join(mici_trouvees) if mici_trouvees else "non précisée"
-            traitements_str = ", ".join(traitements_trouves) if traitements_trouves else "aucun mentionné"
-            symptomes_str = ", ".join(symptomes_trouves) if symptomes_trouves else "aucun mentionné"
-            resume = f"""
-            **Synthèse du compte-rendu:**
-            
-            Le patient est suivi pour {maladies_str}. 
-            Traitement(s): {traitements_str}.
-            Symptômes rapportés: {symptomes_str}.
-            Niveau de sévérité estimé: {niveau_texte}
-            
-            *Note: Ce résumé est généré automatiquement et peut contenir des erreurs.*
-            """
+            resume = generer_resume(analyse)
             st.info(resume)
 
             st.subheader("⏱️ Chronologie détectée")
-            dates_pattern = r'\d{1,2}/\d{1,2}/\d{4}'
-            dates = re.findall(dates_pattern, text_input)
-            if dates:
-                events = []
-                context_keywords = {
-                    "diagnostic": ["diagnostiqué", "diagnostic"],
-                    "traitement": ["traitement", "mise sous", "initiation"],
-                    "consultation": ["consultation", "contrôle"],
-                    "hospitalisation": ["hospitalisation", "admission"]
-                }
-                for i, date in enumerate(dates[:6]):
-                    date_index = text_input.find(date)
-                    start = max(0, date_index - 30)
-                    end = min(len(text_input), date_index + 30)
-                    context = text_input[start:end].lower()
-                    event_type = "Événement"
-                    for event_name, keywords in context_keywords.items():
-                        if any(keyword in context for keyword in keywords):
-                            event_type = event_name.capitalize()
-                            break
-                    events.append({"Date": date, "Événement": event_type})
-                events_df = pd.DataFrame(events)
-                st.dataframe(events_df, use_container_width=True)
+            events = analyse["chronologie"]
+            if events:
+                events_df = pd.DataFrame(events)[["Date", "date_iso", "Événement"]].rename(
+                    columns={"date_iso": "Date (ISO)"}
+                )
+                st.dataframe(events_df, use_container_width=True, hide_index=True)
             else:
-                st.info("Aucune date au format JJ/MM/AAAA n'a été détectée dans le texte.")
+                st.info("Aucune date n'a été détectée dans le texte.")
 
             st.subheader("👥 Patients similaires dans la base de données")
             if mici_trouvees:
-                mici_pattern = "Crohn" if any("Crohn" in m.lower() for m in mici_trouvees) else "RCH" if any("RCH" in m or "rectocolite" in m.lower() for m in mici_trouvees) else ""
-                if mici_pattern:
+                # Maladies et traitements cités (identifiants canoniques : Remicade -> infliximab)
+                termes = termes_entites(entites)
+                with chronometrer(mesures, "patients_similaires"):
+                    lignes, categories = patients_similaires(index_termes, termes)
+                if "mici" in categories:
                     try:
-                        patients_similaires = df[df["maladie"].str.contains(mici_pattern, case=False, na=False)]
-                        if traitements_trouves:
-                            traitements_pattern = "|".join([t.lower() for t in traitements_trouves])
-                            patients_similaires_traitement = patients_similaires[
-                                patients_similaires["traitement"].str.lower().str.contains(traitements_pattern, na=False)
-                            ]
-                            if len(patients_similaires_traitement) > 0:
-                                patients_similaires = patients_similaires_traitement
-                        st.write(f"**{len(patients_similaires)} patients similaires trouvés dans la base de données**")
-                        if len(patients_similaires) > 0:
+                        nb_similaires = len(lignes)
+                        st.write(f"**{nb_similaires} patients similaires trouvés dans la base de données**")
+                        if nb_similaires > 0:
                             st.dataframe(
-                                patients_similaires[["id", "age", "sexe", "maladie", "traitement", "reponse_traitement"]].head(5),
+                                df.iloc[lignes[:5]][["id", "age", "sexe", "maladie", "traitement", "reponse_traitement"]],
                                 use_container_width=True
                             )
-                            efficacite_groupe = patients_similaires["reponse_traitement"].value_counts(normalize=True) * 100
+                            efficacite_groupe = df["reponse_traitement"].iloc[lignes].value_counts() / nb_similaires * 100
                             st.write(f"**Efficacité des traitements chez ces patients:**")
                             st.write(f"• Efficace: {efficacite_groupe.get('Efficace', 0):.1f}%")
                             st.write(f"• Partiel: {efficacite_groupe.get('Partiel', 0):.1f}%")
@@ -343,3 +266,5 @@ def extraction_nlp(df):
                 * La gestion des négations ("pas de fièvre" ne devrait pas extraire "fièvre")
                 """
             )
+
+            afficher_mesures(mesures, "extraction_nlp")
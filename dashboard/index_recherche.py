@@ -0,0 +1,88 @@
+from collections import namedtuple
+import numpy as np
+
+# Colonnes indexées par un bitset par valeur
+COLONNES_INDEXEES = ("sexe", "maladie", "traitement", "reponse_traitement")
+
+# nb_lignes : nombre de patients indexés
+# bitsets : colonne -> valeur -> bitset compacté (np.packbits, un bit par patient)
+# ages : âges distincts, triés ; bitsets_ages : bitset compacté des patients de chaque âge
+IndexRecherche = namedtuple("IndexRecherche", ["nb_lignes", "bitsets", "ages", "bitsets_ages"])
+
+
+def construire_index(df):
+    """
+    Construit l'index de recherche du dataset : un bitset par valeur des
+    colonnes catégorielles et par âge (quelques dizaines d'âges distincts).
+    """
+    bitsets = {}
+    for colonne in COLONNES_INDEXEES:
+        valeurs = df[colonne].astype("category")
+        codes = valeurs.cat.codes.to_numpy()
+        bitsets[colonne] = {
+            valeur: np.packbits(codes == code) for code, valeur in enumerate(valeurs.cat.categories)
+        }
+    ages, codes_ages = np.unique(df["age"].to_numpy(), return_inverse=True)
+    bitsets_ages = np.stack([np.packbits(codes_ages == code) for code in range(len(ages))]) if len(ages) else None
+    return IndexRecherche(len(df), bitsets, ages, bitsets_ages)
+
+
+def _bitset_vide(index):
+    return np.zeros((index.nb_lignes + 7) // 8, dtype=np.uint8)
+
+
+def rechercher(index, age=None, **valeurs):
+    """
+    Bitset des patients qui vérifient tous les critères : `age` est un intervalle
+    (min, max) inclusif, les autres colonnes une valeur ; None signifie « pas de filtre ».
+    """
+    bitsets = []
+    if age is not None:
+        # Union des bitsets des âges de l'intervalle : aucun parcours des patients
+        debut = np.searchsorted(index.ages, age[0], side="left")
+        fin = np.searchsorted(index.ages, age[1], side="right")
+        if debut >= fin:
+            return _bitset_vide(index)
+        if debut > 0 or fin < len(index.ages):
+            bitsets.append(np.bitwise_or.reduce(index.bitsets_ages[debut:fin]))
+    for colonne, valeur in valeurs.items():
+        if valeur is None:
+            continue
+        bitset = index.bitsets[colonne].get(valeur)
+        if bitset is None:
+            return _bitset_vide(index)
+        bitsets.append(bitset)
+    if not bitsets:
+        return np.packbits(np.ones(index.nb_lignes, dtype=bool))
+    return np.bitwise_and.reduce(bitsets)
+
+
+def compter_resultats(bitset):
+    return int(np.bitwise_count(bitset).sum(dtype=np.int64))
+
+
+def lignes_resultat(bitset, debut=0, nombre=None):
+    """
+    Positions (dans le dataset) des résultats numéro `debut` à `debut + nombre`,
+    sans décompacter le bitset au-delà des octets concernés.
+    """
+    if nombre is None:
+        return np.flatnonzero(np.unpackbits(bitset))[debut:]
+    cumul = np.cumsum(np.bitwise_count(bitset), dtype=np.int64)
+    premier_octet = int(np.searchsorted(cumul, debut, side="right"))
+    dernier_octet = int(np.searchsorted(cumul, debut + nombre, side="left")) + 1
+    deja_comptes = int(cumul[premier_octet - 1]) if premier_octet > 0 else 0
+    positions = np.flatnonzero(np.unpackbits(bitset[premier_octet:dernier_octet])) + premier_octet * 8
+    return positions[debut - deja_comptes:debut - deja_comptes + nombre]
+
+
+def blocs_resultat(bitset, taille_bloc=100_000):
+    """
+    Parcourt les positions des résultats par blocs d'au plus `taille_bloc`
+    patients indexés, en ne décompactant qu'une tranche du bitset à la fois.
+    """
+    octets_par_bloc = max(taille_bloc // 8, 1)
+    for debut in range(0, len(bitset), octets_par_bloc):
+        positions = np.flatnonzero(np.unpackbits(bitset[debut:debut + octets_par_bloc])) + debut * 8
+        if len(positions):
+            yield positions
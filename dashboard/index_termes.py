@@ -0,0 +1,100 @@
+from collections import namedtuple
+from itertools import combinations
+import numpy as np
+from nlp_document import construire_document
+from nlp_entites import extraire_entites
+from nlp_lexiques import obtenir_matcher
+
+# Colonne du dataset -> catégorie des lexiques dont elle contient les termes
+COLONNES_TERMES = {"maladie": "mici", "traitement": "traitement"}
+
+# nb_lignes : nombre de patients indexés
+# listes : (catégorie, identifiant canonique) -> positions triées des patients
+#          (listes d'occurrences, ex: ("traitement", "infliximab") -> patients sous Infliximab)
+# version : version des lexiques utilisés pour reconnaître les valeurs du dataset
+IndexTermes = namedtuple("IndexTermes", ["nb_lignes", "listes", "version"])
+
+
+def construire_index_termes(df, matcher=None):
+    """
+    Construit l'index inversé du dataset : chaque valeur distincte des colonnes
+    maladie et traitement est analysée une seule fois avec les lexiques, puis les
+    patients sont rangés sous les identifiants canoniques reconnus
+    (ex: "Crohn iléal" -> ("mici", "crohn")).
+    """
+    matcher = matcher or obtenir_matcher()
+    listes = {}
+    for colonne, categorie in COLONNES_TERMES.items():
+        valeurs = df[colonne].astype("category")
+        codes = valeurs.cat.codes.to_numpy()
+        # Positions des patients regroupées par valeur, dans l'ordre du dataset
+        ordre = np.argsort(codes, kind="stable")
+        bornes = np.searchsorted(codes[ordre], np.arange(len(valeurs.cat.categories) + 1))
+        for code, valeur in enumerate(valeurs.cat.categories):
+            termes = {
+                entite.terme
+                for entite in extraire_entites(construire_document(str(valeur)), matcher)
+                if entite.categorie == categorie
+            }
+            for terme in termes:
+                listes.setdefault((categorie, terme), []).append(ordre[bornes[code]:bornes[code + 1]])
+    listes = {cle: np.sort(np.concatenate(morceaux)) for cle, morceaux in listes.items()}
+    return IndexTermes(len(df), listes, matcher.version)
+
+
+def termes_entites(entites):
+    """
+    Identifiants canoniques des entités extraites d'un texte, par catégorie indexée
+    dans l'ordre de COLONNES_TERMES (les noms commerciaux sont déjà rattachés
+    à leur molécule).
+    """
+    termes = {categorie: set() for categorie in COLONNES_TERMES.values()}
+    for entite in entites:
+        if entite.categorie in termes:
+            termes[entite.categorie].add(entite.terme)
+    return {categorie: identifiants for categorie, identifiants in termes.items() if identifiants}
+
+
+def _union(listes):
+    if len(listes) == 1:
+        return listes[0]
+    lignes = np.sort(np.concatenate(listes))
+    # Une valeur du dataset peut relever de plusieurs identifiants : doublons retirés
+    return lignes[np.concatenate(([True], lignes[1:] != lignes[:-1]))]
+
+
+def _intersection(a, b):
+    # Recherche dichotomique de la plus courte liste dans la plus longue
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[positions] == a]
+
+
+def patients_similaires(index, termes):
+    """
+    Patients qui partagent le plus de catégories de termes avec le texte : ceux
+    dont la maladie et le traitement sont cités si possible, sinon ceux qui
+    partagent l'une des deux (dans l'ordre de `termes`).
+
+    `termes` associe une catégorie aux identifiants canoniques cités (voir
+    termes_entites). Renvoie les positions triées des patients et les catégories
+    partagées.
+    """
+    par_categorie = {}
+    for categorie, identifiants in termes.items():
+        listes = [index.listes[(categorie, terme)] for terme in identifiants if (categorie, terme) in index.listes]
+        if listes:
+            par_categorie[categorie] = _union(listes)
+    # Intersection des listes d'occurrences, en partant des plus courtes
+    for nombre in range(len(par_categorie), 0, -1):
+        for categories in combinations(par_categorie, nombre):
+            listes = sorted((par_categorie[categorie] for categorie in categories), key=len)
+            lignes = listes[0]
+            for liste in listes[1:]:
+                lignes = _intersection(lignes, liste)
+            if len(lignes):
+                return lignes, categories
+    return np.empty(0, dtype=np.int64), ()
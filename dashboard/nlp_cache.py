@@ -0,0 +1,98 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from chronometre import chronometrer
+from nlp_lexiques import obtenir_matcher
+from nlp_pipeline import analyser_texte
+
+# Nombre maximal d'analyses conservées en mémoire (les plus anciennes sont évincées)
+TAILLE_CACHE = 256
+
+# Dossier du cache sur disque, désactivé si la variable d'environnement n'est pas définie
+DOSSIER_CACHE = os.environ.get("MEDINLP_CACHE_DIR")
+
+_CACHE = OrderedDict()
+_VERROU = threading.Lock()
+
+
+def cle_analyse(texte, version):
+    """
+    Empreinte du texte et de la version des lexiques : deux textes identiques
+    analysés avec les mêmes lexiques partagent le même résultat.
+    """
+    empreinte = hashlib.sha256()
+    empreinte.update(version.encode("utf-8"))
+    empreinte.update(b"\0")
+    empreinte.update(texte.encode("utf-8"))
+    return empreinte.hexdigest()
+
+
+def _chemin_disque(dossier, cle):
+    return os.path.join(dossier, cle[:2], cle + ".pkl")
+
+
+def _lire_disque(dossier, cle):
+    try:
+        with open(_chemin_disque(dossier, cle), "rb") as fichier:
+            return pickle.load(fichier)
+    # Fichier tronqué ou écrit par une version antérieure du code : relu comme absent
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return None
+
+
+def _ecrire_disque(dossier, cle, analyse):
+    chemin = _chemin_disque(dossier, cle)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    # Nom unique par appel : les sessions d'un même processus sont des threads
+    descripteur, temporaire = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(chemin))
+    try:
+        with os.fdopen(descripteur, "wb") as fichier:
+            pickle.dump(analyse, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+        # Remplacement atomique pour que plusieurs processus puissent partager le dossier
+        os.replace(temporaire, chemin)
+    except BaseException:
+        try:
+            os.remove(temporaire)
+        except OSError:
+            pass
+        raise
+
+
+def _memoriser(cle, analyse):
+    with _VERROU:
+        _CACHE[cle] = analyse
+        _CACHE.move_to_end(cle)
+        while len(_CACHE) > TAILLE_CACHE:
+            _CACHE.popitem(last=False)
+
+
+def analyser_texte_cache(texte, matcher=None, mesures=None, dossier=DOSSIER_CACHE):
+    """
+    Comme analyser_texte, mais mémorise le résultat par empreinte du texte et
+    de la version des lexiques : en mémoire (LRU borné) et, si un dossier est
+    fourni, sur disque. Le résultat renvoyé est partagé et ne doit pas être modifié.
+    """
+    mesures = {} if mesures is None else mesures
+    matcher = matcher or obtenir_matcher()
+    cle = cle_analyse(texte, matcher.version)
+
+    with chronometrer(mesures, "cache"):
+        with _VERROU:
+            analyse = _CACHE.get(cle)
+            if analyse is not None:
+                _CACHE.move_to_end(cle)
+        if analyse is None and dossier:
+            analyse = _lire_disque(dossier, cle)
+            if analyse is not None:
+                _memoriser(cle, analyse)
+    if analyse is not None:
+        return analyse
+
+    analyse = analyser_texte(texte, matcher, mesures)
+    _memoriser(cle, analyse)
+    if dossier:
+        _ecrire_disque(dossier, cle, analyse)
+    return analyse
@@ -0,0 +1,137 @@
+import re
+from bisect import bisect_left, bisect_right
+from nlp_document import vers_original
+
+# Mois en toutes lettres, sans accents (le scanner travaille sur la vue sans accents)
+MOIS = {
+    "janvier": 1, "fevrier": 2, "mars": 3, "avril": 4, "mai": 5, "juin": 6,
+    "juillet": 7, "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12
+}
+
+# Mots-clés (sans accents) utilisés pour qualifier le contexte d'une date
+CONTEXT_KEYWORDS = {
+    "diagnostic": ["diagnostique", "diagnostic"],
+    "traitement": ["traitement", "mise sous", "initiation"],
+    "consultation": ["consultation", "controle"],
+    "hospitalisation": ["hospitalisation", "admission"],
+    "sortie": ["sortie"],
+    "naissance": ["naissance"]
+}
+
+# Nombre de caractères examinés de part et d'autre d'une date, sans sortir de sa phrase
+FENETRE_CONTEXTE = 30
+
+_MOIS = "|".join(MOIS)
+
+# Un seul scanner pour tous les formats : les formats complets sont essayés en premier
+# pour qu'une année isolée ne soit pas extraite d'une date complète.
+PATTERN_DATES = re.compile(
+    r'(?<!\d)(?P<j1>\d{1,2})[/.-](?P<m1>\d{1,2})[/.-](?P<a1>\d{4})(?!\d)'   # 15/06/2023, 15-06-2023
+    r'|(?<!\d)(?P<a2>\d{4})-(?P<m2>\d{2})-(?P<j2>\d{2})(?!\d)'               # 2023-06-15
+    r'|\b(?P<j3>\d{1,2})(?:er)? (?P<m3>' + _MOIS + r') (?P<a3>\d{4})\b'      # 15 juin 2023, 1er mars 2020
+    r'|\b(?P<m4>' + _MOIS + r') (?P<a4>\d{4})\b'                             # juin 2023
+    r'|\b(?P<a5>(?:19|20)\d{2})\b'                                           # 2015
+)
+
+PATTERN_MOTS_CLES = re.compile(
+    r'\b(?:' + "|".join(
+        re.escape(mot) for mots in CONTEXT_KEYWORDS.values() for mot in sorted(mots, key=len, reverse=True)
+    ) + r')'
+)
+_TYPE_PAR_MOT_CLE = {mot: nom for nom, mots in CONTEXT_KEYWORDS.items() for mot in mots}
+_LONGUEUR_MAX_MOT_CLE = max(len(mot) for mot in _TYPE_PAR_MOT_CLE)
+
+
+def _valeur_date(match):
+    """
+    Renvoie (année, mois, jour) et la précision de la date, ou None si la date est invalide.
+    Le mois et le jour valent 0 lorsqu'ils ne sont pas précisés.
+    """
+    groupes = match.groupdict()
+    if groupes["a1"]:
+        annee, mois, jour = int(groupes["a1"]), int(groupes["m1"]), int(groupes["j1"])
+    elif groupes["a2"]:
+        annee, mois, jour = int(groupes["a2"]), int(groupes["m2"]), int(groupes["j2"])
+    elif groupes["a3"]:
+        annee, mois, jour = int(groupes["a3"]), MOIS[groupes["m3"]], int(groupes["j3"])
+    elif groupes["a4"]:
+        return (int(groupes["a4"]), MOIS[groupes["m4"]], 0), "mois"
+    else:
+        return (int(groupes["a5"]), 0, 0), "annee"
+    if not (1 <= mois <= 12 and 1 <= jour <= 31):
+        return None
+    return (annee, mois, jour), "jour"
+
+
+def _format_iso(valeur, precision):
+    annee, mois, jour = valeur
+    if precision == "jour":
+        return f"{annee:04d}-{mois:02d}-{jour:02d}"
+    if precision == "mois":
+        return f"{annee:04d}-{mois:02d}"
+    return f"{annee:04d}"
+
+
+def _type_evenement(mots_cles, debuts, debut, fin, phrase):
+    """
+    Type d'événement du mot-clé le plus proche de la date dans la fenêtre de contexte.
+    `mots_cles` est trié par position et `debuts` contient leurs positions de début ;
+    seuls les mots-clés de la `phrase` (bornes début, fin) de la date sont retenus.
+    """
+    debut_phrase, fin_phrase = phrase
+    meilleur = None
+    meilleure_distance = FENETRE_CONTEXTE + 1
+    i = bisect_left(debuts, max(debut - FENETRE_CONTEXTE - _LONGUEUR_MAX_MOT_CLE, debut_phrase))
+    while i < len(mots_cles) and mots_cles[i][0] <= min(fin + FENETRE_CONTEXTE, fin_phrase):
+        debut_mot, fin_mot, nom = mots_cles[i]
+        if fin_mot > fin_phrase:
+            distance = FENETRE_CONTEXTE + 1
+        elif fin_mot <= debut:
+            distance = debut - fin_mot
+        elif debut_mot >= fin:
+            distance = debut_mot - fin
+        else:
+            distance = 0
+        if distance < meilleure_distance:
+            meilleur, meilleure_distance = nom, distance
+        i += 1
+    return meilleur.capitalize() if meilleur else "Événement"
+
+
+def extraire_chronologie(document):
+    """
+    Détecte toutes les dates du document (JJ/MM/AAAA, JJ-MM-AAAA, AAAA-MM-JJ,
+    mois en toutes lettres, années seules) et leur associe un type d'événement
+    d'après le mot-clé le plus proche dans la même phrase.
+
+    Le texte est parcouru une seule fois pour les dates et une seule fois pour les
+    mots-clés ; la chronologie est renvoyée triée par date puis par position.
+    """
+    texte = document.sans_accents
+    mots_cles = [
+        (match.start(), match.end(), _TYPE_PAR_MOT_CLE[match.group()])
+        for match in PATTERN_MOTS_CLES.finditer(texte)
+    ]
+    debuts = [mot_cle[0] for mot_cle in mots_cles]
+    debuts_phrases = [phrase[0] for phrase in document.phrases]
+
+    events = []
+    for match in PATTERN_DATES.finditer(texte):
+        resultat = _valeur_date(match)
+        if resultat is None:
+            continue
+        valeur, precision = resultat
+        debut, fin = vers_original(document, match.start(), match.end())
+        # Phrase contenant le début de la date (tout le texte hors découpage)
+        i = bisect_right(debuts_phrases, match.start()) - 1
+        phrase = document.phrases[i] if i >= 0 else (0, len(texte))
+        events.append(((valeur, match.start()), {
+            "Date": document.texte[match.start():match.end()],
+            "Événement": _type_evenement(mots_cles, debuts, match.start(), match.end(), phrase),
+            "date_iso": _format_iso(valeur, precision),
+            "precision": precision,
+            "debut": debut,
+            "fin": fin,
+        }))
+    events.sort(key=lambda element: element[0])
+    return [event for _, event in events]
@@ -0,0 +1,80 @@
+import re
+import unicodedata
+from array import array
+from collections import namedtuple
+
+# Texte prétraité une seule fois et partagé par toutes les étapes d'analyse.
+# - original : texte saisi
+# - texte : espaces normalisés (chaque suite d'espaces devient un espace)
+# - minuscule, sans_accents : vues de même longueur que `texte`
+# - phrases : bornes (début, fin) des phrases dans `texte`
+# - offsets : position dans `original` de chaque caractère de `texte` (+ la fin du texte)
+Document = namedtuple("Document", ["original", "texte", "minuscule", "sans_accents", "phrases", "offsets"])
+
+
+def _table_sans_accents():
+    """
+    Table de traduction qui retire les accents sans changer la longueur du texte.
+    """
+    table = {}
+    for code in range(0xC0, 0x250):
+        caractere = chr(code)
+        base = "".join(c for c in unicodedata.normalize("NFD", caractere) if not unicodedata.combining(c))
+        if len(base) == 1 and base != caractere:
+            table[code] = base
+    return table
+
+
+SANS_ACCENTS = _table_sans_accents()
+
+
+def construire_document(texte):
+    """
+    Normalise les espaces du texte en conservant la correspondance
+    entre positions normalisées et positions d'origine.
+    """
+    morceaux = []
+    offsets = array("I")
+    phrases = []
+    position = 0
+    debut_phrase = 0
+    for espace in re.finditer(r'\s+', texte):
+        morceaux.append(texte[position:espace.start()])
+        offsets.extend(range(position, espace.start()))
+        # Une phrase se termine sur un retour à la ligne ou après une ponctuation finale
+        fin_phrase = len(offsets)
+        if "\n" in espace.group() or (position < espace.start() and texte[espace.start() - 1] in ".!?"):
+            if fin_phrase > debut_phrase:
+                phrases.append((debut_phrase, fin_phrase))
+            debut_phrase = fin_phrase + 1
+        morceaux.append(" ")
+        offsets.append(espace.start())
+        position = espace.end()
+    morceaux.append(texte[position:])
+    offsets.extend(range(position, len(texte)))
+    if len(offsets) > debut_phrase:
+        phrases.append((debut_phrase, len(offsets)))
+    offsets.append(len(texte))
+
+    normalise = "".join(morceaux)
+    minuscule = normalise.lower()
+    if len(minuscule) != len(normalise):
+        # Certains caractères (ex: "İ") s'allongent en minuscule : on garde un seul caractère
+        minuscule = "".join(c.lower()[0] for c in normalise)
+    return Document(
+        original=texte,
+        texte=normalise,
+        minuscule=minuscule,
+        sans_accents=minuscule.translate(SANS_ACCENTS),
+        phrases=tuple(phrases),
+        offsets=offsets,
+    )
+
+
+def vers_original(document, debut, fin):
+    """
+    Convertit des positions du texte normalisé en positions du texte d'origine.
+    """
+    if fin <= debut:
+        return document.offsets[debut], document.offsets[debut]
+    return document.offsets[debut], document.offsets[fin - 1] + 1
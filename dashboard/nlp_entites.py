@@ -0,0 +1,116 @@
+import re
+from html import escape
+from collections import namedtuple
+from nlp_document import vers_original
+
+# Catégories d'entités reconnues
+CATEGORIES = ("mici", "traitement", "symptome")
+
+# Une entité détectée : catégorie, position dans le texte, forme rencontrée et identifiant canonique
+Entite = namedtuple("Entite", ["categorie", "debut", "fin", "forme", "terme"])
+
+# Un matcher compilé : l'expression régulière unique, l'index forme -> (catégorie, identifiant),
+# les libellés par identifiant et la version des lexiques utilisés
+Matcher = namedtuple("Matcher", ["pattern", "index", "libelles", "version"])
+
+
+def _cle(forme):
+    """
+    Clé de recherche d'une forme : espaces normalisés et minuscules.
+    """
+    return re.sub(r'\s+', ' ', forme).lower()
+
+
+def construire_matcher(lexiques, version=""):
+    """
+    Compile tous les lexiques en une seule alternance d'expressions régulières,
+    appliquée à la vue en minuscules du document.
+
+    Chaque libellé et chaque synonyme renvoie vers l'identifiant canonique de son entrée
+    (ex: "Remicade" -> "infliximab"). Les formes sont triées de la plus longue à la plus
+    courte pour que la correspondance la plus longue l'emporte à une même position.
+    """
+    index = {}
+    libelles = {}
+    for lexique in lexiques:
+        categorie = lexique["categorie"]
+        for entree in lexique["entrees"]:
+            libelles[entree["id"]] = entree["libelle"]
+            for forme in [entree["libelle"]] + entree.get("synonymes", []):
+                index.setdefault(_cle(forme), (categorie, entree["id"]))
+    alternatives = [re.escape(cle) for cle in sorted(index, key=len, reverse=True)]
+    pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+    return Matcher(pattern, index, libelles, version)
+
+
+def extraire_entites(document, matcher):
+    """
+    Parcourt le document une seule fois et renvoie la liste des entités détectées,
+    dans l'ordre d'apparition. Les positions se rapportent au texte d'origine.
+    """
+    entites = []
+    for match in matcher.pattern.finditer(document.minuscule):
+        categorie, terme = matcher.index[match.group()]
+        debut, fin = vers_original(document, match.start(), match.end())
+        forme = document.texte[match.start():match.end()]
+        entites.append(Entite(categorie, debut, fin, forme, terme))
+    return entites
+
+
+def formes_par_categorie(entites):
+    """
+    Regroupe les formes distinctes rencontrées par catégorie, dans l'ordre d'apparition.
+    """
+    resultat = {categorie: [] for categorie in CATEGORIES}
+    for entite in entites:
+        formes = resultat.setdefault(entite.categorie, [])
+        if entite.forme not in formes:
+            formes.append(entite.forme)
+    return resultat
+
+
+# Couleurs de surlignage par catégorie
+COULEURS = {
+    "mici": "#ffe066",
+    "traitement": "#b2f2ff",
+    "symptome": "#d3f9d8",
+}
+
+
+def resoudre_chevauchements(entites):
+    """
+    Élimine les entités qui se chevauchent en gardant la plus longue
+    (à longueur égale, la première rencontrée).
+    """
+    retenues = []
+    fin_courante = -1
+    for entite in sorted(entites, key=lambda e: (e.debut, e.debut - e.fin)):
+        if entite.debut >= fin_courante:
+            retenues.append(entite)
+            fin_courante = entite.fin
+        elif entite.fin - entite.debut > retenues[-1].fin - retenues[-1].debut:
+            retenues[-1] = entite
+            fin_courante = entite.fin
+    return retenues
+
+
+def _fragment(texte):
+    return escape(texte, quote=False).replace('\n', '<br>')
+
+
+def surligner_html(texte, entites, couleurs=COULEURS):
+    """
+    Produit le HTML du texte d'origine avec les entités surlignées, en un seul
+    parcours à partir des positions des entités.
+    """
+    morceaux = []
+    position = 0
+    for entite in resoudre_chevauchements(entites):
+        morceaux.append(_fragment(texte[position:entite.debut]))
+        morceaux.append(
+            f'<span style="background-color: {couleurs[entite.categorie]}; color: #222; '
+            f'border-radius:3px; padding: 0 3px;">{_fragment(texte[entite.debut:entite.fin])}</span>'
+        )
+        position = entite.fin
+    morceaux.append(_fragment(texte[position:]))
+    return "".join(morceaux)
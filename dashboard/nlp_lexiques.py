@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import threading
+from nlp_entites import construire_matcher
+
+# Dossier des lexiques versionnés (un fichier JSON par catégorie d'entités)
+DOSSIER_LEXIQUES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "lexiques")
+
+# Matchers déjà compilés dans ce processus : dossier -> (signature des fichiers, matcher)
+_MATCHERS = {}
+_VERROU = threading.Lock()
+
+
+def _fichiers(dossier):
+    return sorted(
+        os.path.join(dossier, nom) for nom in os.listdir(dossier) if nom.endswith(".json")
+    )
+
+
+def _signature(dossier):
+    """
+    Signature des fichiers de lexiques (nom, date de modification, taille),
+    qui change dès qu'un fichier est modifié, ajouté ou supprimé.
+    """
+    signature = []
+    for chemin in _fichiers(dossier):
+        infos = os.stat(chemin)
+        signature.append((chemin, infos.st_mtime_ns, infos.st_size))
+    return tuple(signature)
+
+
+def charger_lexiques(dossier=DOSSIER_LEXIQUES):
+    """
+    Lit les lexiques du dossier et calcule leur version à partir de leur contenu.
+    """
+    lexiques = []
+    empreinte = hashlib.sha256()
+    for chemin in _fichiers(dossier):
+        with open(chemin, "rb") as fichier:
+            contenu = fichier.read()
+        empreinte.update(contenu)
+        lexiques.append(json.loads(contenu.decode("utf-8")))
+    return lexiques, empreinte.hexdigest()[:16]
+
+
+def obtenir_matcher(dossier=DOSSIER_LEXIQUES):
+    """
+    Renvoie le matcher compilé pour les lexiques du dossier.
+
+    Le matcher est compilé une seule fois par processus et n'est reconstruit
+    que si l'un des fichiers de lexiques a changé (rechargement à chaud).
+    """
+    signature = _signature(dossier)
+    en_cache = _MATCHERS.get(dossier)
+    if en_cache is not None and en_cache[0] == signature:
+        return en_cache[1]
+    with _VERROU:
+        en_cache = _MATCHERS.get(dossier)
+        if en_cache is None or en_cache[0] != signature:
+            lexiques, version = charger_lexiques(dossier)
+            en_cache = (signature, construire_matcher(lexiques, version))
+            _MATCHERS[dossier] = en_cache
+    return en_cache[1]
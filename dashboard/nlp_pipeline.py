@@ -0,0 +1,77 @@
+from chronometre import chronometrer
+from nlp_dates import extraire_chronologie
+from nlp_document import construire_document
+from nlp_entites import extraire_entites, formes_par_categorie
+from nlp_lexiques import obtenir_matcher
+
+# Symptômes (identifiants des lexiques) pris en compte pour le score de sévérité
+SYMPTOMES_GRAVES = {"sang_selles", "diarrhee", "perte_poids", "saignement"}
+SYMPTOMES_MODERES = {"fatigue", "douleur_abdominale", "ulceration", "asthenie"}
+
+
+def evaluer_severite(entites):
+    """
+    Calcule un score de sévérité normalisé (entre 0 et 1) et le niveau associé
+    à partir des symptômes distincts détectés.
+    """
+    score_severite = 0
+    symptomes = {entite.terme for entite in entites if entite.categorie == "symptome"}
+    for symptome in symptomes:
+        if symptome in SYMPTOMES_GRAVES:
+            score_severite += 2
+        elif symptome in SYMPTOMES_MODERES:
+            score_severite += 1
+    score_normalise = min(score_severite / 8, 1.0)
+    niveau = "Léger" if score_normalise < 0.33 else "Modéré" if score_normalise < 0.66 else "Sévère"
+    return score_normalise, niveau
+
+
+def generer_resume(analyse):
+    """
+    Rédige la synthèse automatique du compte-rendu à partir du résultat de l'analyse.
+    """
+    maladies_str = ", ".join(analyse["maladies"]) if analyse["maladies"] else "non précisée"
+    traitements_str = ", ".join(analyse["traitements"]) if analyse["traitements"] else "aucun mentionné"
+    symptomes_str = ", ".join(analyse["symptomes"]) if analyse["symptomes"] else "aucun mentionné"
+    return f"""
+            **Synthèse du compte-rendu:**
+            
+            Le patient est suivi pour {maladies_str}. 
+            Traitement(s): {traitements_str}.
+            Symptômes rapportés: {symptomes_str}.
+            Niveau de sévérité estimé: {analyse["niveau_severite"]}
+            
+            *Note: Ce résumé est généré automatiquement et peut contenir des erreurs.*
+            """
+
+
+def analyser_texte(texte, matcher=None, mesures=None):
+    """
+    Enchaîne les étapes d'analyse d'un compte-rendu à partir d'un document
+    prétraité une seule fois : entités, sévérité et chronologie. Le document
+    lui-même n'est pas renvoyé (les positions des entités se rapportent au texte
+    d'origine) : le résultat mis en cache reste petit devant le texte analysé.
+
+    Si un dictionnaire `mesures` est fourni, la durée de chaque étape y est ajoutée (en ms).
+    """
+    mesures = {} if mesures is None else mesures
+    matcher = matcher or obtenir_matcher()
+    with chronometrer(mesures, "normalisation"):
+        document = construire_document(texte)
+    with chronometrer(mesures, "entites"):
+        entites = extraire_entites(document, matcher)
+        formes = formes_par_categorie(entites)
+    with chronometrer(mesures, "severite"):
+        score, niveau = evaluer_severite(entites)
+    with chronometrer(mesures, "chronologie"):
+        chronologie = extraire_chronologie(document)
+    return {
+        "entites": entites,
+        "maladies": formes["mici"],
+        "traitements": formes["traitement"],
+        "symptomes": formes["symptome"],
+        "libelles": {entite.forme: matcher.libelles[entite.terme] for entite in entites},
+        "score_severite": score,
+        "niveau_severite": niveau,
+        "chronologie": chronologie,
+    }
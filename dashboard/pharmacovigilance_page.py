@@ -2,8 +2,58 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
+from collections import namedtuple
 
-def pharmacovigilance(df):
+# Tableau croisé traitement x effet secondaire et ses dénominateurs
+TableauEffets = namedtuple("TableauEffets", ["comptes", "patients", "patients_avec_effets"])
+
+
+def croiser_effets(df, effets, masque=None):
+    """
+    Calcule en une seule passe vectorisée, pour les patients sélectionnés par `masque` :
+    - comptes : nombre de signalements par traitement (lignes) et effet (colonnes)
+    - patients : nombre de patients par traitement
+    - patients_avec_effets : nombre de patients par traitement ayant au moins un effet
+    `effets` est la table longue des effets, indexée (dans l'ordre) par la position du patient dans `df`.
+    """
+    traitements = df["traitement"].astype("category")
+    codes = traitements.cat.codes.to_numpy()
+    categories_traitement = traitements.cat.categories
+    categories_effet = effets["effet"].cat.categories
+    nb_traitements, nb_effets = len(categories_traitement), len(categories_effet)
+
+    # Lignes d'effets appartenant à la population sélectionnée
+    positions = effets.index.to_numpy()
+    codes_effet = effets["effet"].cat.codes.to_numpy()
+    if masque is None:
+        patients = np.bincount(codes, minlength=nb_traitements)
+    else:
+        patients = np.bincount(codes[masque], minlength=nb_traitements)
+        garder = masque[positions]
+        positions, codes_effet = positions[garder], codes_effet[garder]
+    codes_patient = codes[positions].astype(np.intp)
+
+    comptes = np.bincount(
+        codes_patient * nb_effets + codes_effet, minlength=nb_traitements * nb_effets
+    ).reshape(nb_traitements, nb_effets)
+
+    # La table des effets est ordonnée par patient : on ne compte que sa première ligne
+    premiere = np.empty(len(positions), dtype=bool)
+    premiere[:1] = True
+    np.not_equal(positions[1:], positions[:-1], out=premiere[1:])
+    patients_avec_effets = np.bincount(codes_patient[premiere], minlength=nb_traitements)
+
+    # Seuls les traitements présents dans la population sont conservés
+    presents = patients > 0
+    return TableauEffets(
+        comptes=pd.DataFrame(comptes[presents], index=categories_traitement[presents], columns=categories_effet),
+        patients=pd.Series(patients[presents], index=categories_traitement[presents]),
+        patients_avec_effets=pd.Series(patients_avec_effets[presents], index=categories_traitement[presents]),
+    )
+
+
+def pharmacovigilance(df, effets):
     # Titre et description
     st.title("⚠️ Pharmacovigilance et tolérance")
     st.write(
@@ -22,33 +72,32 @@ def pharmacovigilance(df):
         sexe_selectionne = st.selectbox("Sexe du patient :", sexes_disponibles)
 
     # --- 2. Application des filtres ---
-    df_filtre = df.copy()
+    conditions = []
     if traitement_selectionne != "Tous":
-        df_filtre = df_filtre[df_filtre["traitement"] == traitement_selectionne]
+        conditions.append((df["traitement"] == traitement_selectionne).to_numpy())
     if sexe_selectionne != "Tous":
-        df_filtre = df_filtre[df_filtre["sexe"] == sexe_selectionne]
+        conditions.append((df["sexe"] == sexe_selectionne).to_numpy())
+    masque = np.logical_and.reduce(conditions) if conditions else None
 
     # --- 3. Calculs basés sur les données filtrées ---
-    effets_filtres = []
-    patients_avec_effets = 0
-    for idx, row in df_filtre.iterrows():
-        effets = row["effets_secondaires"]
-        if isinstance(effets, str) and effets.strip():
-            effets_liste = effets.split(',')
-            effets_filtres.extend([effet.strip() for effet in effets_liste])
-            patients_avec_effets += 1
+    # Un seul tableau croisé dont découlent tous les graphiques et tableaux
+    tableau = croiser_effets(df, effets, masque)
+    nb_patients_filtres = int(tableau.patients.sum())
+    patients_avec_effets = int(tableau.patients_avec_effets.sum())
+    effets_counts_filtres = tableau.comptes.sum(axis=0).sort_values(ascending=False)
+    effets_counts_filtres = effets_counts_filtres[effets_counts_filtres > 0]
 
     # --- 4. Affichage des métriques dynamiques ---
     st.subheader("📈 Indicateurs pour la population filtrée")
     col1, col2, col3 = st.columns(3)
-    col1.metric("Effets secondaires signalés", len(effets_filtres))
+    col1.metric("Effets secondaires signalés", int(effets_counts_filtres.sum()))
     col2.metric("Patients avec effets secondaires", patients_avec_effets)
-    pourcentage_effets = (patients_avec_effets / len(df_filtre) * 100) if not df_filtre.empty else 0
+    pourcentage_effets = (patients_avec_effets / nb_patients_filtres * 100) if nb_patients_filtres else 0
     col3.metric("% patients avec effets", f"{pourcentage_effets:.1f}%")
-    st.info(f"Population filtrée : {len(df_filtre)} patients sur {len(df)} patients totaux")
+    st.info(f"Population filtrée : {nb_patients_filtres} patients sur {len(df)} patients totaux")
 
     # Si aucun patient ne correspond aux critères, on arrête ici
-    if df_filtre.empty:
+    if nb_patients_filtres == 0:
         st.warning("Aucun patient ne correspond aux critères sélectionnés. Veuillez modifier les filtres.")
         return
 
@@ -56,8 +105,8 @@ def pharmacovigilance(df):
 
     # Top 10 des effets secondaires
     st.subheader("📊 Top effets secondaires")
-    if effets_filtres:
-        effets_counts = pd.Series(effets_filtres).value_counts().head(10)
+    if not effets_counts_filtres.empty:
+        effets_counts = effets_counts_filtres.head(10)
         fig1 = px.bar(
             x=effets_counts.values,
             y=effets_counts.index,
@@ -75,66 +124,45 @@ def pharmacovigilance(df):
 
     # Carte de chaleur des effets secondaires par traitement
     st.subheader("🔥 Distribution des effets par traitement")
-    effets_par_traitement = {}
-    for traitement in df_filtre["traitement"].unique():
-        df_traitement_specifique = df_filtre[df_filtre["traitement"] == traitement]
-        effets_traitement = []
-        for effets in df_traitement_specifique["effets_secondaires"].dropna():
-            if isinstance(effets, str) and effets.strip():
-                effets_traitement.extend([e.strip() for e in effets.split(',')])
-        if effets_traitement:
-            effets_par_traitement[traitement] = pd.Series(effets_traitement).value_counts()
-
-    if effets_par_traitement:
-        heatmap_df = pd.DataFrame(effets_par_traitement).fillna(0).astype(int)
-        top_effets = pd.Series(effets_filtres).value_counts().head(10).index
-        heatmap_df_filtre = heatmap_df.loc[heatmap_df.index.isin(top_effets)]
-        
-        if not heatmap_df_filtre.empty:
-            fig2 = px.imshow(
-                heatmap_df_filtre.T,
-                labels=dict(x="Effet secondaire", y="Traitement", color="Fréquence"),
-                color_continuous_scale="Reds",
-                title="Fréquence des effets secondaires par traitement"
-            )
-            st.plotly_chart(fig2, use_container_width=True)
-        else:
-            st.info("Pas assez de données pour afficher la distribution.")
+    effets_par_traitement = tableau.comptes[tableau.comptes.sum(axis=1) > 0]
+
+    if not effets_par_traitement.empty:
+        heatmap_df_filtre = effets_par_traitement[effets_counts_filtres.head(10).index]
+        fig2 = px.imshow(
+            heatmap_df_filtre,
+            labels=dict(x="Effet secondaire", y="Traitement", color="Fréquence"),
+            color_continuous_scale="Reds",
+            title="Fréquence des effets secondaires par traitement"
+        )
+        st.plotly_chart(fig2, use_container_width=True)
     else:
         st.info("Aucune donnée d'effet secondaire pour créer la carte de chaleur.")
 
     # Tableau détaillé des effets secondaires
     st.subheader("📋 Détail des effets secondaires")
-    tableau_effets = []
-    for traitement in df_filtre["traitement"].unique():
-        df_traitement = df_filtre[df_filtre["traitement"] == traitement]
-        total_patients = len(df_traitement)
-        effets_traitement_str = df_traitement["effets_secondaires"].dropna()
-        
-        if not effets_traitement_str.empty:
-            effets_liste = [e.strip() for effets in effets_traitement_str for e in effets.split(',')]
-            effets_counts = pd.Series(effets_liste).value_counts()
-            
-            for effet, count in effets_counts.items():
-                tableau_effets.append({
-                    "Traitement": traitement,
-                    "Effet secondaire": effet,
-                    "Nombre de cas": count,
-                    "% des patients du groupe": f"{count/total_patients*100:.1f}%"
-                })
-
-    if tableau_effets:
-        df_tableau = pd.DataFrame(tableau_effets)
-        st.dataframe(df_tableau, use_container_width=True)
+    df_tableau = (
+        tableau.comptes.rename_axis(index="Traitement", columns="Effet secondaire")
+        .stack()
+        .rename("Nombre de cas")
+        .reset_index()
+    )
+    df_tableau = df_tableau[df_tableau["Nombre de cas"] > 0]
+
+    if not df_tableau.empty:
+        df_tableau = df_tableau.sort_values(["Traitement", "Nombre de cas"], ascending=[True, False])
+        total_patients = tableau.patients.reindex(df_tableau["Traitement"]).to_numpy()
+        df_tableau["% des patients du groupe"] = [
+            f"{pourcentage:.1f}%" for pourcentage in df_tableau["Nombre de cas"].to_numpy() / total_patients * 100
+        ]
+        st.dataframe(df_tableau, use_container_width=True, hide_index=True)
     else:
         st.info("Aucune donnée disponible pour le tableau détaillé.")
 
     # Conclusion et insights
     st.subheader("💡 Points clés à retenir")
-    if effets_par_traitement:
-        effets_totaux_par_traitement = {t: v.sum() for t, v in effets_par_traitement.items()}
-        traitement_plus_effets = max(effets_totaux_par_traitement, key=effets_totaux_par_traitement.get)
-        effet_plus_frequent = pd.Series(effets_filtres).value_counts().index[0]
+    if not effets_par_traitement.empty:
+        traitement_plus_effets = effets_par_traitement.sum(axis=1).idxmax()
+        effet_plus_frequent = effets_counts_filtres.index[0]
 
         st.info(
             f"""
@@ -145,4 +173,4 @@ def pharmacovigilance(df):
             """
         )
     else:
-        st.info("Données insuffisantes pour générer des insights.")
\ No newline at end of file
+        st.info("Données insuffisantes pour générer des insights.")
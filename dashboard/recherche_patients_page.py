@@ -1,8 +1,13 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+from cube_cohorte import age_moyen as calculer_age_moyen, compter, filtrer_cube, nombre_patients
+from exports_cohorte import FORMATS, exporter_resultats, supprimer_export
+from index_recherche import compter_resultats, lignes_resultat, rechercher
 
-def recherche_patients(df):
+# Nombre de patients affichés par page de résultats
+TAILLE_PAGE = 50
+
+def recherche_patients(df, cube, index):
     # Titre et description
     st.title("🔍 Recherche de patients")
     st.write(
@@ -11,7 +16,7 @@ def recherche_patients(df):
     )
     
     # Compteur global
-    st.info(f"Base de données: {len(df)} patients au total")
+    st.info(f"Base de données: {nombre_patients(cube)} patients au total")
     
     # Création des filtres en colonnes
     st.subheader("📋 Critères de recherche")
@@ -23,19 +28,19 @@ def recherche_patients(df):
         # Filtre par âge
         age_min, age_max = st.slider(
             "Âge :", 
-            min_value=int(df["age"].min()), 
-            max_value=int(df["age"].max()), 
-            value=(int(df["age"].min()), int(df["age"].max()))
+            min_value=int(cube.comptes["age"].min()), 
+            max_value=int(cube.comptes["age"].max()), 
+            value=(int(cube.comptes["age"].min()), int(cube.comptes["age"].max()))
         )
     
     with col2:
         # Filtre par sexe
-        sexes_disponibles = ["Tous"] + list(df["sexe"].unique())
+        sexes_disponibles = ["Tous"] + list(cube.comptes["sexe"].unique())
         sexe_selectionne = st.selectbox("Sexe :", sexes_disponibles)
     
     with col3:
         # Filtre par type de MICI
-        maladies_disponibles = ["Toutes"] + list(df["maladie"].unique())
+        maladies_disponibles = ["Toutes"] + list(cube.comptes["maladie"].unique())
         maladie_selectionnee = st.selectbox("Type de MICI :", maladies_disponibles)
     
     # Deuxième ligne de filtres
@@ -43,32 +48,28 @@ def recherche_patients(df):
     
     with col1:
         # Filtre par traitement
-        traitements_disponibles = ["Tous"] + sorted(df["traitement"].unique().tolist())
+        traitements_disponibles = ["Tous"] + sorted(cube.comptes["traitement"].unique().tolist())
         traitement_selectionne = st.selectbox("Traitement :", traitements_disponibles)
     
     with col2:
         # Filtre par réponse au traitement
-        reponses_disponibles = ["Toutes"] + sorted(df["reponse_traitement"].unique().tolist())
+        reponses_disponibles = ["Toutes"] + sorted(cube.comptes["reponse_traitement"].unique().tolist())
         reponse_selectionnee = st.selectbox("Réponse au traitement :", reponses_disponibles)
     
-    # Application des filtres
-    df_filtre = df.copy()
-    df_filtre = df_filtre[(df_filtre["age"] >= age_min) & (df_filtre["age"] <= age_max)]
-    
-    if sexe_selectionne != "Tous":
-        df_filtre = df_filtre[df_filtre["sexe"] == sexe_selectionne]
-    
-    if maladie_selectionnee != "Toutes":
-        df_filtre = df_filtre[df_filtre["maladie"] == maladie_selectionnee]
-    
-    if traitement_selectionne != "Tous":
-        df_filtre = df_filtre[df_filtre["traitement"] == traitement_selectionne]
-    
-    if reponse_selectionnee != "Toutes":
-        df_filtre = df_filtre[df_filtre["reponse_traitement"] == reponse_selectionnee]
+    # Application des filtres (None : pas de filtre sur ce critère)
+    criteres = {
+        "age": (age_min, age_max),
+        "sexe": None if sexe_selectionne == "Tous" else sexe_selectionne,
+        "maladie": None if maladie_selectionnee == "Toutes" else maladie_selectionnee,
+        "traitement": None if traitement_selectionne == "Tous" else traitement_selectionne,
+        "reponse_traitement": None if reponse_selectionnee == "Toutes" else reponse_selectionnee,
+    }
+    # Patients correspondants (bitset de l'index) et profil du groupe (tranche du cube)
+    resultat = rechercher(index, **criteres)
+    tranche = filtrer_cube(cube, **criteres)
     
     # Afficher le nombre de résultats
-    nb_resultats = len(df_filtre)
+    nb_resultats = compter_resultats(resultat)
     if nb_resultats > 0:
         st.success(f"✅ {nb_resultats} patients correspondent aux critères de recherche")
     else:
@@ -79,33 +80,36 @@ def recherche_patients(df):
     st.subheader("📊 Profil du groupe sélectionné")
     col1, col2, col3 = st.columns(3)
     
-    age_moyen = df_filtre["age"].mean()
+    age_moyen = calculer_age_moyen(tranche)
     col1.metric("Âge moyen", f"{age_moyen:.1f} ans")
     
-    nb_hommes = (df_filtre["sexe"] == "H").sum()
-    nb_femmes = (df_filtre["sexe"] == "F").sum()
+    par_sexe = compter(tranche, ["sexe"])
+    nb_hommes = int(par_sexe.get("H", 0))
+    nb_femmes = int(par_sexe.get("F", 0))
     col2.metric("Hommes / Femmes", f"{nb_hommes} / {nb_femmes}")
     
-    taux_efficacite = (df_filtre["reponse_traitement"] == "Efficace").mean() * 100
+    par_reponse = compter(tranche, ["reponse_traitement"])
+    taux_efficacite = par_reponse.get("Efficace", 0) / nb_resultats * 100
     col3.metric("Taux d'efficacité", f"{taux_efficacite:.1f}%")
     
     # Graphiques d'analyse du groupe
+    par_maladie = compter(tranche, ["maladie"])
     col1, col2 = st.columns(2)
     with col1:
-        if len(df_filtre["maladie"].unique()) > 1:
+        if len(par_maladie) > 1:
             fig1 = px.pie(
-                df_filtre, 
-                names="maladie",
+                values=par_maladie.to_numpy(),
+                names=par_maladie.index.astype(str),
                 title="Répartition par type de MICI"
             )
             st.plotly_chart(fig1, use_container_width=True)
         else:
-            st.info(f"Tous les patients ont la maladie: {df_filtre['maladie'].iloc[0]}")
+            st.info(f"Tous les patients ont la maladie: {par_maladie.index[0]}")
     
     with col2:
         fig2 = px.pie(
-            df_filtre,
-            names="reponse_traitement",
+            values=par_reponse.to_numpy(),
+            names=par_reponse.index.astype(str),
             title="Réponses aux traitements",
             color_discrete_sequence=px.colors.sequential.RdBu
         )
@@ -114,69 +118,70 @@ def recherche_patients(df):
     # Liste des patients
     st.subheader("👥 Liste des patients")
     colonnes_a_afficher = ["id", "age", "sexe", "maladie", "traitement", "reponse_traitement"]
+    nb_pages = (nb_resultats - 1) // TAILLE_PAGE + 1
+    numero_page = st.number_input(f"Page (sur {nb_pages}) :", min_value=1, max_value=nb_pages, value=1)
+    # Seules les lignes de la page affichée sont extraites du dataset
+    df_page = df.iloc[lignes_resultat(resultat, (numero_page - 1) * TAILLE_PAGE, TAILLE_PAGE)]
     st.dataframe(
-        df_filtre[colonnes_a_afficher],
+        df_page[colonnes_a_afficher],
         use_container_width=True,
         hide_index=True
     )
     
     # Option pour voir les détails
     with st.expander("Voir les détails complets"):
-        st.dataframe(df_filtre, use_container_width=True)
+        st.dataframe(df_page, use_container_width=True)
     
-    # Export en PDF (plus professionnel et préserve les caractères spéciaux)
+    # Exports générés seulement à la demande, bloc par bloc dans un fichier temporaire
     st.subheader("📄 Exporter les résultats")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Garder l'option CSV pour compatibilité
-        csv = df_filtre.to_csv(index=False, encoding="utf-8-sig")
-        st.download_button(
-            label="📥 Télécharger CSV",
-            data=csv,
-            file_name="patients_filtres.csv",
-            mime="text/csv"
-        )
+        format_export = st.radio("Format :", list(FORMATS), horizontal=True)
+        chemin = None
+        if st.button("Préparer l'export"):
+            barre = st.progress(0.0, text="Export en cours...")
+            chemin = exporter_resultats(
+                df, resultat, format_export,
+                colonnes=colonnes_a_afficher if format_export == "Rapport HTML" else None,
+                progression=lambda avancement: barre.progress(avancement, text="Export en cours..."),
+            )
+            barre.empty()
     
     with col2:
-        # Générer un rapport PDF basique avec HTML
-        from io import StringIO
-        import base64
-        
-        # Créer une représentation HTML pour PDF
-        html_string = f"""
-        <h2>Rapport de recherche patients - MediNLP</h2>
-        <p>Date d'extraction : {pd.Timestamp.now().strftime('%d/%m/%Y')}</p>
-        <p><b>{nb_resultats} patients correspondent aux critères</b></p>
-        <hr>
-        {df_filtre[colonnes_a_afficher].to_html(index=False)}
-        <hr>
-        <p><i>Dashboard MediNLP - Projet FORECAST MICI</i></p>
-        """
-        
-        # Encoder en base64 pour le téléchargement
-        b64 = base64.b64encode(html_string.encode()).decode()
-        
-        st.download_button(
-            label="📄 Télécharger rapport",
-            data=html_string,
-            file_name="rapport_patients.html",
-            mime="text/html"
-        )
-        
-        st.caption("💡 Le rapport HTML peut être imprimé en PDF depuis votre navigateur")
+        if chemin is not None:
+            # Le bouton transmet le fichier à streamlit une seule fois, dans cette
+            # exécution : le fichier temporaire est supprimé aussitôt et rien n'est
+            # conservé dans la session (le téléchargement ne relance pas le script)
+            extension, mime = FORMATS[format_export]
+            try:
+                with open(chemin, "rb") as fichier:
+                    st.download_button(
+                        label=f"📥 Télécharger ({format_export})",
+                        data=fichier,
+                        file_name=f"patients_filtres.{extension}",
+                        mime=mime,
+                        on_click="ignore",
+                    )
+            finally:
+                supprimer_export(chemin)
+            if format_export == "Rapport HTML":
+                st.caption("💡 Le rapport HTML peut être imprimé en PDF depuis votre navigateur")
+        else:
+            st.caption("Choisissez un format puis préparez l'export pour le télécharger.")
     
     # Informations complémentaires sur la cohorte
+    par_traitement = compter(tranche, ["traitement"])
     st.subheader("💡 Cas similaires")
     st.info(
         f"""
         **Analyse de la cohorte filtrée :**
         
-        * {nb_resultats} patients correspondent aux critères sélectionnés ({nb_resultats/len(df)*100:.1f}% de la base)
-        * Âge moyen: {age_moyen:.1f} ans (min: {df_filtre['age'].min()}, max: {df_filtre['age'].max()})
+        * {nb_resultats} patients correspondent aux critères sélectionnés ({nb_resultats/nombre_patients(cube)*100:.1f}% de la base)
+        * Âge moyen: {age_moyen:.1f} ans (min: {tranche.comptes['age'].min()}, max: {tranche.comptes['age'].max()})
         * Répartition par sexe: {nb_hommes} hommes ({nb_hommes/nb_resultats*100:.1f}%) et {nb_femmes} femmes ({nb_femmes/nb_resultats*100:.1f}%)
-        * Traitement principal: {df_filtre['traitement'].value_counts().index[0]} ({df_filtre['traitement'].value_counts().iloc[0]} patients)
+        * Traitement principal: {par_traitement.idxmax()} ({par_traitement.max()} patients)
         
         Cette cohorte peut être utilisée pour des analyses plus approfondies ou pour identifier des profils spécifiques.
         """
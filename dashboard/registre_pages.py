@@ -0,0 +1,113 @@
+"""
+Registre des pages du dashboard : chaque module de page (et avec lui plotly)
+n'est importé qu'à la première sélection de la page.
+
+Rapport des temps d'import de chaque page (chacune dans un processus neuf) :
+    python dashboard/registre_pages.py
+"""
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# Libellé de la page -> (module, fonction de la page)
+PAGES = {
+    "💊 Traitements": ("traitements_page", "traitements"),
+    "📊 Analyse comparative": ("analyse_comparative_page", "analyse_traitements"),
+    "⚠️ Pharmacovigilance": ("pharmacovigilance_page", "pharmacovigilance"),
+    "🔍 Recherche patients": ("recherche_patients_page", "recherche_patients"),
+    "🧠 Aide à la décision": ("aide_decision_page", "aide_decision"),
+    "🔍 Extraction NLP": ("extraction_nlp_page", "extraction_nlp"),
+}
+
+# Préchauffage des autres pages après le premier affichage (désactivable)
+PRECHAUFFAGE = os.environ.get("MEDINLP_PRECHAUFFAGE", "1") != "0"
+
+# Module -> durée (ms) de son premier import dans ce processus
+_TEMPS_IMPORT = {}
+_VERROU = threading.Lock()
+_prechauffage = None
+
+
+def _importer(nom):
+    # import_module attend la fin d'un import en cours dans un autre thread
+    # (préchauffage) au lieu de renvoyer un module partiellement initialisé
+    deja_importe = nom in sys.modules
+    debut = time.perf_counter()
+    module = importlib.import_module(nom)
+    if not deja_importe:
+        _TEMPS_IMPORT.setdefault(nom, (time.perf_counter() - debut) * 1000)
+    return module
+
+
+def charger_page(libelle):
+    """
+    Renvoie la fonction de la page, en important son module au premier appel.
+    """
+    module, fonction = PAGES[libelle]
+    return getattr(_importer(module), fonction)
+
+
+def prechauffer():
+    """
+    Importe en arrière-plan les modules des pages pas encore chargées, une
+    seule fois par processus, pour que leur première ouverture soit immédiate.
+    """
+    global _prechauffage
+    if not PRECHAUFFAGE:
+        return
+    with _VERROU:
+        if _prechauffage is not None:
+            return
+        modules = [module for module, _ in PAGES.values()]
+        _prechauffage = threading.Thread(
+            target=lambda: [_importer(module) for module in modules],
+            name="prechauffage-pages",
+            daemon=True,
+        )
+        _prechauffage.start()
+
+
+def temps_imports():
+    """
+    Durée (ms) du premier import de chaque module de page dans ce processus.
+    """
+    return dict(_TEMPS_IMPORT)
+
+
+def mesurer_import(module, dossier=os.path.dirname(os.path.abspath(__file__))):
+    """
+    Importe le module dans un processus neuf (python -X importtime) et renvoie
+    son temps d'import cumulé et celui de chaque dépendance de premier niveau (ms).
+    """
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=dossier, capture_output=True, text=True, check=True,
+    )
+    dependances = {}
+    for ligne in resultat.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", les dépendances
+        # (indentées de deux espaces par niveau) étant listées avant le module qui les importe
+        trouve = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", ligne)
+        if not trouve:
+            continue
+        cumul, niveau, nom = int(trouve.group(1)) / 1000, len(trouve.group(2)) // 2, trouve.group(3)
+        if niveau == 0:
+            if nom == module:
+                return cumul, dependances
+            dependances = {}
+        elif niveau == 1:
+            dependances[nom] = cumul
+    return 0.0, {}
+
+
+if __name__ == "__main__":
+    for libelle, (module, _) in PAGES.items():
+        total, dependances = mesurer_import(module)
+        principales = sorted(dependances.items(), key=lambda item: item[1], reverse=True)[:5]
+        print(f"{module:<28} {total:>8.1f} ms  ({libelle})")
+        for nom, duree in principales:
+            print(f"    {nom:<24} {duree:>8.1f} ms")
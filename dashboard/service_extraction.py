@@ -0,0 +1,238 @@
+"""
+Service HTTP local d'extraction NLP.
+
+Exemple :
+    python dashboard/service_extraction.py --port 8502
+
+Points d'accès :
+    POST /extract        {"texte": "..."}
+    POST /extract/batch  {"textes": ["...", "..."]}
+    GET  /stats          latences p50/p99 et textes en cours
+"""
+import argparse
+import asyncio
+import json
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import tornado.web
+
+from nlp_cache import analyser_texte_cache
+
+# Taille maximale d'un micro-lot et délai d'attente pour le compléter
+TAILLE_LOT = 32
+DELAI_LOT_MS = 5
+
+# Nombre maximal de textes en cours d'analyse, toutes requêtes confondues
+# (au-delà : 503) ; un lot plus grand est refusé (413)
+MAX_EN_COURS = 256
+
+# Nombre de latences conservées pour le calcul des percentiles
+HISTORIQUE_LATENCES = 10000
+
+
+def analyse_en_json(analyse):
+    """
+    Convertit le résultat d'une analyse en dictionnaire sérialisable en JSON.
+    """
+    return {
+        "maladies": analyse["maladies"],
+        "traitements": analyse["traitements"],
+        "symptomes": analyse["symptomes"],
+        "entites": [entite._asdict() for entite in analyse["entites"]],
+        "score_severite": analyse["score_severite"],
+        "niveau_severite": analyse["niveau_severite"],
+        "chronologie": analyse["chronologie"],
+    }
+
+
+def analyser_textes(textes):
+    """
+    Analyse un micro-lot de textes (exécuté dans un processus du pool).
+    """
+    return [analyse_en_json(analyser_texte_cache(texte)) for texte in textes]
+
+
+def percentile(valeurs, p):
+    if not valeurs:
+        return 0.0
+    triees = sorted(valeurs)
+    return triees[min(len(triees) - 1, int(p / 100 * len(triees)))]
+
+
+class MicroLots:
+    """
+    Regroupe les textes des requêtes concurrentes en petits lots
+    avant de les confier au pool de processus.
+    """
+
+    def __init__(self, pool, taille_lot=TAILLE_LOT, delai_ms=DELAI_LOT_MS):
+        self.pool = pool
+        self.taille_lot = taille_lot
+        self.delai = delai_ms / 1000
+        self.file = asyncio.Queue()
+        self.taches = set()
+
+    async def analyser(self, texte):
+        futur = asyncio.get_running_loop().create_future()
+        await self.file.put((texte, futur))
+        return await futur
+
+    async def boucle(self):
+        boucle = asyncio.get_running_loop()
+        while True:
+            lot = [await self.file.get()]
+            echeance = boucle.time() + self.delai
+            while len(lot) < self.taille_lot:
+                restant = echeance - boucle.time()
+                if restant <= 0:
+                    break
+                try:
+                    lot.append(await asyncio.wait_for(self.file.get(), restant))
+                except asyncio.TimeoutError:
+                    break
+            tache = asyncio.ensure_future(self._traiter(lot))
+            self.taches.add(tache)
+            tache.add_done_callback(self.taches.discard)
+
+    async def _traiter(self, lot):
+        textes = [texte for texte, _ in lot]
+        try:
+            resultats = await asyncio.get_running_loop().run_in_executor(self.pool, analyser_textes, textes)
+        except Exception as erreur:
+            for _, futur in lot:
+                if not futur.done():
+                    futur.set_exception(erreur)
+            return
+        for (_, futur), resultat in zip(lot, resultats):
+            if not futur.done():
+                futur.set_result(resultat)
+
+
+class EtatService:
+    """
+    Compteurs partagés par les gestionnaires de requêtes.
+    """
+
+    def __init__(self, micro_lots, max_en_cours=MAX_EN_COURS):
+        self.micro_lots = micro_lots
+        self.max_en_cours = max_en_cours
+        self.en_cours = 0
+        self.requetes = 0
+        self.rejets = 0
+        self.latences = deque(maxlen=HISTORIQUE_LATENCES)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, etat):
+        self.etat = etat
+
+    def lire_json(self):
+        try:
+            contenu = json.loads(self.request.body or b"{}")
+        except ValueError:
+            # JSON mal formé ou corps qui n'est pas de l'UTF-8
+            raise tornado.web.HTTPError(400, reason="JSON invalide")
+        if not isinstance(contenu, dict):
+            raise tornado.web.HTTPError(400, reason="Objet JSON attendu")
+        return contenu
+
+    def repondre(self, contenu):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.write(json.dumps(contenu, ensure_ascii=False))
+
+    async def traiter(self, textes):
+        """
+        Analyse les textes via les micro-lots, ou répond 503 et renvoie None
+        si trop de textes sont déjà en cours d'analyse. Chaque texte occupe une
+        place : un lot ne peut pas dépasser la limite à lui seul.
+        """
+        etat = self.etat
+        if len(textes) > etat.max_en_cours:
+            raise tornado.web.HTTPError(413, reason=f"Lot limité à {etat.max_en_cours} textes")
+        if etat.en_cours + len(textes) > etat.max_en_cours:
+            etat.rejets += 1
+            self.set_status(503)
+            self.set_header("Retry-After", "1")
+            self.repondre({"erreur": "Service saturé"})
+            return None
+        etat.en_cours += len(textes)
+        debut = time.perf_counter()
+        try:
+            return await asyncio.gather(*(etat.micro_lots.analyser(texte) for texte in textes))
+        finally:
+            etat.en_cours -= len(textes)
+            etat.requetes += 1
+            etat.latences.append((time.perf_counter() - debut) * 1000)
+
+
+class ExtractHandler(BaseHandler):
+    async def post(self):
+        texte = self.lire_json().get("texte")
+        if not isinstance(texte, str):
+            raise tornado.web.HTTPError(400, reason="Champ 'texte' manquant")
+        resultats = await self.traiter([texte])
+        if resultats is not None:
+            self.repondre(resultats[0])
+
+
+class ExtractBatchHandler(BaseHandler):
+    async def post(self):
+        textes = self.lire_json().get("textes")
+        if not isinstance(textes, list) or not all(isinstance(texte, str) for texte in textes):
+            raise tornado.web.HTTPError(400, reason="Champ 'textes' manquant")
+        resultats = await self.traiter(textes)
+        if resultats is not None:
+            self.repondre({"resultats": resultats})
+
+
+class StatsHandler(BaseHandler):
+    def get(self):
+        etat = self.etat
+        latences = list(etat.latences)
+        self.repondre({
+            "requetes": etat.requetes,
+            "rejets": etat.rejets,
+            "en_cours": etat.en_cours,
+            "latence_p50_ms": round(percentile(latences, 50), 3),
+            "latence_p99_ms": round(percentile(latences, 99), 3),
+        })
+
+
+def creer_application(etat):
+    return tornado.web.Application([
+        (r"/extract", ExtractHandler, {"etat": etat}),
+        (r"/extract/batch", ExtractBatchHandler, {"etat": etat}),
+        (r"/stats", StatsHandler, {"etat": etat}),
+    ])
+
+
+async def demarrer(port, adresse, workers, max_en_cours):
+    # Arrêt propre sur SIGINT/SIGTERM pour que les processus du pool soient libérés
+    arret = asyncio.Event()
+    for signal_arret in (signal.SIGINT, signal.SIGTERM):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_arret, arret.set)
+        except NotImplementedError:
+            pass
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        micro_lots = MicroLots(pool)
+        etat = EtatService(micro_lots, max_en_cours)
+        serveur = creer_application(etat).listen(port, address=adresse)
+        print(f"Service d'extraction à l'écoute sur http://{adresse}:{port}", flush=True)
+        boucle = asyncio.ensure_future(micro_lots.boucle())
+        await arret.wait()
+        serveur.stop()
+        boucle.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service HTTP local d'extraction NLP")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--adresse", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-en-cours", type=int, default=MAX_EN_COURS, help="Nombre maximal de textes en cours d'analyse")
+    args = parser.parse_args()
+    asyncio.run(demarrer(args.port, args.adresse, args.workers, args.max_en_cours))
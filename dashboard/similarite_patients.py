@@ -0,0 +1,152 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Colonnes du dataset utilisées par l'index de similarité
+COLONNES_SIMILARITE = ("age", "anciennete", "sexe", "maladie", "traitement", "reponse_traitement")
+
+# Formes étendues, retenues comme formes sévères (le dataset n'a pas de colonne de sévérité)
+FORMES_SEVERES = ("RCH extensive", "Crohn iléo-colique")
+
+# Écarts comptant pour une unité de distance : 10 ans d'âge, 5 ans d'ancienneté ;
+# un sexe différent, une autre forme de la maladie ou une sévérité différente
+# comptent chacun pour 1, un autre type de maladie (Crohn / RCH / MICI) pour 2 de plus
+ECHELLE_AGE = 10.0
+ECHELLE_ANCIENNETE = 5.0
+POIDS_SEXE = 1.0
+POIDS_FORME = 1.0
+POIDS_TYPE = 2.0
+POIDS_SEVERITE = 1.0
+
+# cellules : vecteurs de caractéristiques distincts (une ligne par combinaison
+#            âge x ancienneté x sexe x maladie), dont les patients sont identiques pour la distance
+# normes : carré de la norme de chaque cellule
+# debuts : position dans `lignes` du premier patient de chaque cellule (et fin du dernier)
+# lignes : positions des patients dans le dataset, regroupées par cellule
+# traitements / efficaces : code du traitement et réponse "Efficace" de chaque patient de `lignes`
+# sexes / maladies / noms_traitements : valeurs des catégories encodées
+IndexSimilarite = namedtuple("IndexSimilarite", [
+    "cellules", "normes", "debuts", "lignes", "traitements", "efficaces", "sexes", "maladies", "noms_traitements",
+])
+
+
+def type_maladie(maladie):
+    if "Crohn" in maladie:
+        return "Crohn"
+    if "RCH" in maladie:
+        return "RCH"
+    return "MICI"
+
+
+def _encoder(age, anciennete, sexe, maladie, severe, sexes, maladies):
+    """
+    Caractéristiques pondérées : la distance euclidienne entre deux vecteurs est
+    la distance entre deux patients.
+    """
+    types = sorted({type_maladie(nom) for nom in maladies})
+    nb = len(age)
+    caracteristiques = np.zeros((nb, 3 + len(sexes) + len(maladies) + len(types)), dtype=np.float64)
+    caracteristiques[:, 0] = np.asarray(age) / ECHELLE_AGE
+    caracteristiques[:, 1] = np.asarray(anciennete) / ECHELLE_ANCIENNETE
+    caracteristiques[:, 2] = np.asarray(severe) * POIDS_SEVERITE
+    colonne = 3
+    # Un écart de `poids` entre deux valeurs différentes d'un encodage one-hot
+    for codes, nombre, poids in (
+        (sexe, len(sexes), POIDS_SEXE),
+        (maladie, len(maladies), POIDS_FORME),
+        (np.array([types.index(type_maladie(nom)) for nom in maladies])[maladie], len(types), POIDS_TYPE),
+    ):
+        caracteristiques[np.arange(nb), colonne + np.asarray(codes)] = poids / np.sqrt(2)
+        colonne += nombre
+    return caracteristiques
+
+
+def construire_similarite(df):
+    """
+    Construit l'index de similarité du dataset : les patients sont regroupés par
+    vecteur de caractéristiques, ce qui ramène une cohorte de millions de patients
+    à quelques milliers de cellules parcourues à chaque requête.
+    """
+    sexe = df["sexe"].astype("category")
+    maladie = df["maladie"].astype("category")
+    traitement = df["traitement"].astype("category")
+    sexes = list(sexe.cat.categories)
+    maladies = list(maladie.cat.categories)
+
+    cles = pd.DataFrame({
+        "age": df["age"].to_numpy(),
+        "anciennete": df["anciennete"].to_numpy(),
+        "sexe": sexe.cat.codes.to_numpy(),
+        "maladie": maladie.cat.codes.to_numpy(),
+    })
+    cellule = cles.groupby(list(cles.columns), sort=True).ngroup().to_numpy()
+    lignes = np.argsort(cellule, kind="stable")
+    debuts = np.searchsorted(cellule[lignes], np.arange(cellule.max() + 2 if len(cellule) else 1))
+    premiers = cles.iloc[lignes[debuts[:-1]]]
+
+    severe = np.isin(np.array(maladies, dtype=object)[premiers["maladie"]], FORMES_SEVERES)
+    cellules = _encoder(
+        premiers["age"], premiers["anciennete"], premiers["sexe"].to_numpy(), premiers["maladie"].to_numpy(),
+        severe, sexes, maladies,
+    )
+    return IndexSimilarite(
+        cellules,
+        (cellules ** 2).sum(axis=1),
+        debuts,
+        lignes,
+        traitement.cat.codes.to_numpy()[lignes],
+        (df["reponse_traitement"] == "Efficace").to_numpy()[lignes],
+        sexes,
+        maladies,
+        list(traitement.cat.categories),
+    )
+
+
+def plus_proches_voisins(index, age, anciennete, sexe, maladie, severe=False, k=100):
+    """
+    Les `k` patients les plus proches du profil : indices dans `index.lignes`
+    (par distance croissante) et distances. Un sexe ou une maladie absent du
+    dataset n'a aucun voisin.
+    """
+    if sexe not in index.sexes or maladie not in index.maladies:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    requete = _encoder(
+        [age], [anciennete], [index.sexes.index(sexe)], [index.maladies.index(maladie)],
+        [severe], index.sexes, index.maladies,
+    )[0]
+    # |c - q|² = |c|² - 2 c.q + |q|² : un seul produit matrice-vecteur sur les cellules
+    distances = np.sqrt(np.maximum(index.normes - 2 * index.cellules @ requete + requete @ requete, 0))
+    tailles = np.diff(index.debuts)
+
+    # Chaque cellule compte au moins un patient : les k cellules les plus proches
+    # suffisent, seules celles-ci sont triées
+    nb = min(k, len(distances))
+    candidates = np.argpartition(distances, nb - 1)[:nb] if nb < len(distances) else np.arange(nb)
+    ordre = candidates[np.argsort(distances[candidates], kind="stable")]
+    cumul = np.cumsum(tailles[ordre])
+    retenues = ordre[:np.searchsorted(cumul, k) + 1]
+    rangs = np.concatenate([np.arange(index.debuts[c], index.debuts[c + 1]) for c in retenues])[:k]
+    return rangs, np.repeat(distances[retenues], tailles[retenues])[:k]
+
+
+def recommander(index, rangs, distances):
+    """
+    Efficacité des traitements chez les voisins, chaque voisin étant pondéré
+    par 1 / (1 + distance) : les patients les plus proches comptent davantage.
+    """
+    poids = 1.0 / (1.0 + distances)
+    traitements = index.traitements[rangs]
+    nb = len(index.noms_traitements)
+    total = np.bincount(traitements, weights=poids, minlength=nb)
+    efficaces = np.bincount(traitements, weights=poids * index.efficaces[rangs], minlength=nb)
+    patients = np.bincount(traitements, minlength=nb)
+    resultats = pd.DataFrame({
+        "traitement": index.noms_traitements,
+        "efficacite": np.divide(efficaces, total, out=np.zeros(nb), where=total > 0) * 100,
+        "patients": patients,
+        "distance_moyenne": np.divide(
+            np.bincount(traitements, weights=distances, minlength=nb), patients,
+            out=np.zeros(nb), where=patients > 0,
+        ),
+    })
+    return resultats[resultats["patients"] > 0].sort_values("efficacite", ascending=False).reset_index(drop=True)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from cube_cohorte import filtrer_cube
+
+# Nombre maximal de résultats conservés en mémoire (les plus anciens sont évincés)
+TAILLE_CACHE = 512
+
+_CACHE = OrderedDict()
+_VERROU = threading.Lock()
+
+
+def cle_filtres(jeton, filtres):
+    """
+    Clé canonique d'un jeu de filtres sur un cube : l'ordre des filtres, les
+    filtres vides (None) et l'ordre des valeurs d'une liste n'y changent rien.
+    """
+    criteres = []
+    for dimension, valeur in sorted(filtres.items()):
+        if valeur is None:
+            continue
+        if dimension == "age":
+            valeur = (int(valeur[0]), int(valeur[1]))
+        elif isinstance(valeur, (list, tuple, set, frozenset)):
+            valeur = tuple(sorted(valeur))
+        criteres.append((dimension, valeur))
+    return jeton, tuple(criteres)
+
+
+def _calculer(cube, filtres):
+    comptes = filtrer_cube(cube, **filtres).comptes
+    # Un seul regroupement : effectifs par (traitement, réponse), avec et sans effet secondaire
+    groupes = (
+        comptes.assign(avec_effet=comptes["patients"] * comptes["a_effet"])
+        .groupby(["traitement", "reponse_traitement"], observed=True)[["patients", "avec_effet"]]
+        .sum()
+    )
+    statistiques = groupes["patients"].unstack(fill_value=0)
+    statistiques.columns = statistiques.columns.astype(str)
+    statistiques["patients"] = statistiques.sum(axis=1)
+    statistiques["avec_effet"] = groupes["avec_effet"].groupby(level="traitement", observed=True).sum()
+    statistiques.index = statistiques.index.astype(str)
+    return statistiques
+
+
+def statistiques_traitements(cube, **filtres):
+    """
+    Effectifs par traitement (une ligne par traitement) : une colonne par réponse
+    au traitement, plus "patients" et "avec_effet" (patients ayant au moins un
+    effet secondaire). Les filtres sont ceux de filtrer_cube ; une dimension peut
+    aussi recevoir une liste de valeurs. Le résultat est mémorisé par clé de
+    filtres et partagé entre pages et sessions : il ne doit pas être modifié.
+    """
+    cle = cle_filtres(cube.jeton, filtres)
+    with _VERROU:
+        statistiques = _CACHE.get(cle)
+        if statistiques is not None:
+            _CACHE.move_to_end(cle)
+            return statistiques
+
+    statistiques = _calculer(cube, filtres)
+    with _VERROU:
+        _CACHE[cle] = statistiques
+        while len(_CACHE) > TAILLE_CACHE:
+            _CACHE.popitem(last=False)
+    return statistiques
+
+
+def taux_reponses(statistiques, reponses=None):
+    """
+    Pourcentage de chaque réponse par traitement.
+    """
+    reponses = reponses or [colonne for colonne in statistiques.columns if colonne not in ("patients", "avec_effet")]
+    comptes = statistiques.reindex(columns=reponses, fill_value=0)
+    return comptes.div(statistiques["patients"], axis=0).fillna(0.0) * 100
+
+
+def repartition_reponses(statistiques):
+    """
+    Nombre de patients par réponse, tous traitements confondus.
+    """
+    return statistiques.drop(columns=["patients", "avec_effet"]).sum()
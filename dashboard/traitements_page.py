@@ -1,32 +1,36 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from statistiques_cohorte import statistiques_traitements, taux_reponses
 
-def traitements(df):
+def traitements(df, cube):
     # 1 Titre et description
     st.title("💊 Analyse des traitements")
     st.write("Explore l'efficacité des traitements et leur évolution dans la cohorte.")
 
     #  Sélection du traitement
-    traitements_disponibles = sorted(df["traitement"].unique())
+    statistiques = statistiques_traitements(cube)
+    traitements_disponibles = sorted(statistiques.index)
     selected = st.selectbox("Sélectionner un traitement :", traitements_disponibles)
 
-    #  Filtrer les données pour le traitement choisi
-    df_sel = df[df["traitement"] == selected]
+    #  Effectifs du traitement choisi
+    stats_sel = statistiques.loc[selected]
+    nb_patients = int(stats_sel["patients"])
 
     #  KPIs clés
     col1, col2, col3 = st.columns(3)
-    col1.metric("👥 Patients", len(df_sel))
-    col2.metric("% de la cohorte", f"{len(df_sel)/len(df)*100:.1f}%")
-    col3.metric("🎯 Efficacité", f"{(df_sel['reponse_traitement'] == 'Efficace').mean()*100:.1f}%" )
+    col1.metric("👥 Patients", nb_patients)
+    col2.metric("% de la cohorte", f"{nb_patients/statistiques['patients'].sum()*100:.1f}%")
+    col3.metric("🎯 Efficacité", f"{taux_reponses(statistiques, ['Efficace']).loc[selected, 'Efficace']:.1f}%" )
     # Pie et graphique temporel côte à côte
     col1, col2 = st.columns(2)
 
     with col1:
         st.subheader(f"📊 Efficacité - {selected}")
         status_counts = (
-            df_sel["reponse_traitement"]
-            .value_counts()
+            stats_sel.drop(["patients", "avec_effet"])
+            .loc[lambda comptes: comptes > 0]
+            .sort_values(ascending=False)
             .rename_axis("statut")
             .reset_index(name="count")
         )
@@ -39,6 +43,7 @@ def traitements(df):
         st.plotly_chart(fig1, use_container_width=True)
     with col2:
         st.subheader("📈 Évolution temporelle")
+        df_sel = df[df["traitement"] == selected]
         if "date_consultation" in df_sel.columns:
             # Regroupement par trimestre pour lisser le graphique
             df_time = (
@@ -1,7 +1,21 @@
-import random
+import argparse
 import datetime
+import itertools
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
+# Date de référence par défaut (consultations les plus récentes) : fixe, pour
+# qu'une même graine donne la même cohorte quel que soit le jour de génération
+DEFAULT_REFERENCE_DATE = datetime.date(2025, 7, 28)
+
+# Nom des fichiers de shards écrits par generate_dataset
+SHARD_NAME = re.compile(r"part-\d{5}\.(?:parquet|csv)")
+
 # Définition des distributions pondérées selon la littérature médicale
 
 # 1. Démographie
@@ -90,142 +104,359 @@ SIDE_EFFECTS_BY_TREATMENT = {
     ]
 }
 
-# Fonction pour choisir une tranche d'âge spécifiquement
-def choose_age_bin(bins):
-    weights = [weight for _, _, weight in bins]
-    index = random.choices(range(len(bins)), weights=weights, k=1)[0]
-    return bins[index][0], bins[index][1]
+# Nombre d'effets secondaires d'un patient qui en a (pondéré vers 1)
+NB_EFFECTS_WEIGHTS = [(1, 0.7), (2, 0.2), (3, 0.1)]
 
-# Fonction utilitaire pour le choix pondéré
-def weighted_choice(pairs):
+def disease_type(maladie):
     """
-    Effectue un choix pondéré parmi une liste de paires (élément, poids)
+    Type de maladie (Crohn, RCH ou MICI) d'un diagnostic.
     """
-    items, weights = zip(*pairs)
-    return random.choices(items, weights=weights, k=1)[0]
+    if "Crohn" in maladie:
+        return "Crohn"
+    if "RCH" in maladie:
+        return "RCH"
+    return "MICI"
 
-def generate_patient_infos(patient_id):
+def weighted_codes(rng, pairs, size):
     """
-    Génère les informations de base pour un patient avec des distributions réalistes.
+    Tire `size` indices dans une liste de paires (élément, poids), selon les poids.
     """
-    # Choix du diagnostic avec pondération
-    maladie = weighted_choice(DIAG_WEIGHTS)
-    
-    # Détermination du type de maladie (Crohn, RCH ou MICI)
-    if "Crohn" in maladie:
-        type_maladie = "Crohn"
-    elif "RCH" in maladie:
-        type_maladie = "RCH"
-    else:
-        type_maladie = "MICI"
-    
-    # Choix du sexe selon le diagnostic
-    sexe = weighted_choice(SEX_BY_DIAG[type_maladie])
-    
-    # Choix de la tranche d'âge puis de l'âge spécifique
-    age_min, age_max = choose_age_bin(AGE_BINS)
-    age = random.randint(age_min, age_max)
-    
-    # Ancienneté de la maladie (distribution triangulaire centrée sur 5-7 ans)
-    max_anciennete = min(20, age - 15)  # Max 20 ans, mais pas plus que l'âge - 15 ans minimum
-    if max_anciennete <= 0:
-        anciennete = 1
-    else:
-        # Distribution triangulaire avec pic vers 5-7 ans
-        mid_point = min(6, max_anciennete // 2)
-        
-        # Correction pour éviter l'erreur de range
-        if mid_point < 1:
-            anciennete = 1
-        elif random.random() < 0.7:  # 70% des cas dans la première moitié
-            anciennete = random.randint(1, mid_point)
-        else:
-            # Assurer que l'intervalle est valide
-            start_range = mid_point + 1
-            if start_range > max_anciennete:
-                anciennete = max_anciennete
-            else:
-                anciennete = random.randint(start_range, max_anciennete)
-    
+    weights = np.array([weight for *_, weight in pairs], dtype=float)
+    return rng.choice(len(pairs), size=size, p=weights / weights.sum())
+
+def weighted_codes_by_group(rng, groups, group_names, pairs_by_group, items):
+    """
+    Pour chaque ligne, tire l'indice (dans `items`) d'un élément selon les poids
+    du groupe de la ligne (`groups` : indices dans `group_names`).
+    """
+    codes = np.empty(len(groups), dtype=np.int64)
+    for group, name in enumerate(group_names):
+        rows = np.flatnonzero(groups == group)
+        pairs = pairs_by_group[name]
+        lookup = np.array([items.index(item) for item, _ in pairs])
+        codes[rows] = lookup[weighted_codes(rng, pairs, len(rows))]
+    return codes
+
+def categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=list(categories))
+
+def generate_ages(rng, n):
+    bins = weighted_codes(rng, AGE_BINS, n)
+    low = np.array([low for low, _, _ in AGE_BINS])[bins]
+    high = np.array([high for _, high, _ in AGE_BINS])[bins]
+    return rng.integers(low, high + 1)
+
+def generate_seniority(rng, ages):
+    """
+    Ancienneté de la maladie : 70% des cas entre 1 an et le point milieu
+    (au plus 6 ans), les autres au-delà, sans dépasser min(20, âge - 15).
+    """
+    max_seniority = np.minimum(20, ages - 15)
+    mid_point = np.minimum(6, max_seniority // 2)
+    first_half = rng.integers(1, np.maximum(mid_point, 1) + 1)
+    start = mid_point + 1
+    second_half = rng.integers(np.minimum(start, max_seniority), np.maximum(max_seniority, start) + 1)
+    second_half = np.where(start > max_seniority, max_seniority, second_half)
+    seniority = np.where(rng.random(len(ages)) < 0.7, first_half, second_half)
+    return np.where((max_seniority <= 0) | (mid_point < 1), 1, seniority)
+
+def generate_dates(rng, n, reference_date):
+    """
+    Dates de consultation : 70% dans les 5 dernières années, les autres entre 5 et 20 ans.
+    """
+    recent = rng.integers(0, 5 * 365 + 1, size=n)
+    older = rng.integers(5 * 365, 20 * 365 + 1, size=n)
+    days_ago = np.where(rng.random(n) < 0.7, recent, older)
+    # Au plus 20 * 365 + 1 dates distinctes, formatées une seule fois chacune
+    labels = [
+        (reference_date - datetime.timedelta(days=days)).strftime("%d-%m-%Y")
+        for days in range(20 * 365 + 1)
+    ]
+    return categorical(days_ago, labels)
+
+def generate_side_effects(rng, treatment_codes, treatments):
+    """
+    Effets secondaires : avec la probabilité 1 - P(Aucun) du traitement, 1 à 3
+    effets distincts tirés uniformément parmi ceux du traitement (valeur
+    manquante sinon, comme à la relecture du CSV).
+    """
+    labels = []
+    codes = np.full(len(treatment_codes), -1, dtype=np.int64)
+    nb_effects_values = np.array([count for count, _ in NB_EFFECTS_WEIGHTS])
+    for code, treatment in enumerate(treatments):
+        rows = np.flatnonzero(treatment_codes == code)
+        effects = [effect for effect, _ in SIDE_EFFECTS_BY_TREATMENT[treatment] if effect != "Aucun"]
+        proba_effects = 1 - dict(SIDE_EFFECTS_BY_TREATMENT[treatment]).get("Aucun", 0)
+        if not effects or not len(rows):
+            continue
+        has_effects = rng.random(len(rows)) < proba_effects
+        nb_effects = nb_effects_values[weighted_codes(rng, NB_EFFECTS_WEIGHTS, len(rows))]
+        # Tirage sans remise : ordre aléatoire des effets, dont on garde les premiers
+        width = min(nb_effects_values.max(), len(effects))
+        nb_effects = np.minimum(nb_effects, width)
+        order = np.argsort(rng.random((len(rows), len(effects))), axis=1)[:, :width]
+        # (nombre d'effets, premiers effets de l'ordre) codé en base len(effects),
+        # puis remplacé par son libellé calculé une seule fois
+        base = len(effects) ** np.arange(width)[::-1]
+        combination_codes = (nb_effects - 1) * len(effects) ** width + order @ base
+        for count in range(1, width + 1):
+            for chosen in itertools.product(range(len(effects)), repeat=width):
+                labels.append(",".join(effects[index] for index in chosen[:count]))
+        codes[rows] = np.where(has_effects, len(labels) - width * len(effects) ** width + combination_codes, -1)
+    unique_labels, inverse = np.unique(np.array(labels, dtype=object), return_inverse=True)
+    codes = np.where(codes >= 0, inverse[codes], -1)
+    # Seules les combinaisons effectivement tirées (sans répétition) sont conservées
+    return categorical(codes, unique_labels).remove_unused_categories()
+
+def generate_cohort(n, seed=None, reference_date=None, first_id=1):
+    """
+    Génère une cohorte de `n` patients (une consultation chacun) en tirages
+    vectorisés ; la même graine et la même date de référence donnent la même cohorte.
+    `seed` peut être un entier ou une numpy.random.SeedSequence.
+    """
+    rng = np.random.default_rng(seed)
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+
+    diagnoses = [maladie for maladie, _ in DIAG_WEIGHTS]
+    types = list(SEX_BY_DIAG)
+    maladie = weighted_codes(rng, DIAG_WEIGHTS, n)
+    type_maladie = np.array([types.index(disease_type(d)) for d in diagnoses])[maladie]
+
+    sexes = ["H", "F"]
+    sexe = weighted_codes_by_group(rng, type_maladie, types, SEX_BY_DIAG, sexes)
+    ages = generate_ages(rng, n)
+    anciennete = generate_seniority(rng, ages)
+    dates = generate_dates(rng, n, reference_date)
+
+    treatments = list(RESPONSE_BY_TREATMENT)
+    traitement = weighted_codes_by_group(rng, type_maladie, types, TREATMENTS_BY_DIAG, treatments)
+    responses = [response for response, _ in RESPONSE_BY_TREATMENT[treatments[0]]]
+    reponse = weighted_codes_by_group(rng, traitement, treatments, RESPONSE_BY_TREATMENT, responses)
+    effets = generate_side_effects(rng, traitement, treatments)
+
+    return pd.DataFrame({
+        "id": np.arange(first_id, first_id + n),
+        "age": ages,
+        "sexe": categorical(sexe, sexes),
+        "maladie": categorical(maladie, diagnoses),
+        "anciennete": anciennete,
+        "date_consultation": dates,
+        "traitement": categorical(traitement, treatments),
+        "effets_secondaires": effets,
+        "reponse_traitement": categorical(reponse, responses),
+    })
+
+def count_distributions(df):
+    """
+    Effectifs utilisés pour contrôler les distributions d'une cohorte
+    (dictionnaires simples, additionnables d'un shard à l'autre).
+    """
+    types = df["maladie"].map(disease_type).astype(str)
+    age_bins = pd.cut(df["age"], [low - 1 for low, _, _ in AGE_BINS] + [AGE_BINS[-1][1]],
+                      labels=[f"{low}-{high}" for low, high, _ in AGE_BINS])
+
+    def crosstab(groups, values):
+        table = pd.crosstab(groups.astype(str), values.astype(str))
+        return {group: {value: int(count) for value, count in row.items()} for group, row in table.iterrows()}
+
     return {
-        "id": patient_id,
-        "age": age,
-        "sexe": sexe,
-        "maladie": maladie,
-        "anciennete": anciennete
+        "maladie": {"Tous": {str(k): int(v) for k, v in df["maladie"].value_counts().items()}},
+        "age": {"Tous": {str(k): int(v) for k, v in age_bins.value_counts().items()}},
+        "sexe_par_type": crosstab(types, df["sexe"]),
+        "traitement_par_type": crosstab(types, df["traitement"]),
+        "reponse_par_traitement": crosstab(df["traitement"], df["reponse_traitement"]),
+        "effets_par_traitement": crosstab(df["traitement"], df["effets_secondaires"].notna().map({True: "Oui", False: "Non"})),
     }
 
-def generate_consultation(patient):
+def merge_counts(total, counts):
+    for name, groups in counts.items():
+        for group, values in groups.items():
+            merged = total.setdefault(name, {}).setdefault(group, {})
+            for value, count in values.items():
+                merged[value] = merged.get(value, 0) + count
+    return total
+
+def expected_distributions():
     """
-    Génère les données de consultation pour un patient donné avec des distributions réalistes.
+    Distributions attendues, dans le même format que count_distributions (proportions).
     """
-    # Date de consultation (0 à 20 ans en arrière, distribution triangulaire)
-    today = datetime.date.today()
-    if random.random() < 0.7:  # 70% des consultations dans les 5 dernières années
-        days_ago = random.randint(0, 5 * 365)
-    else:
-        days_ago = random.randint(5 * 365, 20 * 365)
-    date_consultation = today - datetime.timedelta(days=days_ago)
-    
-    # Déterminer le type de maladie pour la sélection du traitement
-    if "Crohn" in patient["maladie"]:
-        type_maladie = "Crohn"
-    elif "RCH" in patient["maladie"]:
-        type_maladie = "RCH"
+    def normalize(pairs):
+        total = sum(weight for *_, weight in pairs)
+        return {str(item[0]) if len(item) == 2 else f"{item[0]}-{item[1]}": item[-1] / total for item in pairs}
+
+    return {
+        "maladie": {"Tous": normalize(DIAG_WEIGHTS)},
+        "age": {"Tous": normalize(AGE_BINS)},
+        "sexe_par_type": {group: normalize(pairs) for group, pairs in SEX_BY_DIAG.items()},
+        "traitement_par_type": {group: normalize(pairs) for group, pairs in TREATMENTS_BY_DIAG.items()},
+        "reponse_par_traitement": {group: normalize(pairs) for group, pairs in RESPONSE_BY_TREATMENT.items()},
+        "effets_par_traitement": {
+            group: {"Oui": 1 - dict(pairs).get("Aucun", 0), "Non": dict(pairs).get("Aucun", 0)}
+            for group, pairs in SIDE_EFFECTS_BY_TREATMENT.items()
+        },
+    }
+
+def check_distributions(counts):
+    """
+    Écart maximal (en points de proportion) entre les proportions observées et attendues.
+    """
+    checks = {}
+    for name, groups in expected_distributions().items():
+        deviation = 0.0
+        for group, expected in groups.items():
+            observed = counts.get(name, {}).get(group, {})
+            total = sum(observed.values())
+            if not total:
+                continue
+            for value, proportion in expected.items():
+                deviation = max(deviation, abs(observed.get(value, 0) / total - proportion))
+        checks[name] = {"ecart_max": round(deviation, 6)}
+    return checks
+
+def generate_shard(shard, rows, first_id, seed, reference_date, path, file_format):
+    """
+    Génère un shard de la cohorte, l'écrit dans `path` et renvoie ses effectifs.
+    """
+    df = generate_cohort(rows, seed, reference_date, first_id)
+    if file_format == "parquet":
+        df.to_parquet(path, index=False)
     else:
-        type_maladie = "MICI"
-    
-    # Sélection du traitement selon le type de maladie
-    traitement = weighted_choice(TREATMENTS_BY_DIAG[type_maladie])
-    
-    # Sélection de la réponse au traitement
-    reponse = weighted_choice(RESPONSE_BY_TREATMENT[traitement])
-    
-    # Sélection des effets secondaires
-    effets_possibles = [effet for effet, _ in SIDE_EFFECTS_BY_TREATMENT[traitement] if effet != "Aucun"]
-    
-    # Probabilité d'avoir des effets secondaires (inverse du poids "Aucun")
-    proba_effets = 1 - dict(SIDE_EFFECTS_BY_TREATMENT[traitement]).get("Aucun", 0)
-    
-    if random.random() < proba_effets and effets_possibles:
-        # Nombre d'effets secondaires (1 à 3, pondéré vers 1)
-        nb_effets = random.choices([1, 2, 3], weights=[0.7, 0.2, 0.1])[0]
-        nb_effets = min(nb_effets, len(effets_possibles))
-        
-        effets_secondaires = random.sample(
-            population=effets_possibles,
-            k=nb_effets
+        df.to_csv(path, index=False, header=False)
+    return {"shard": shard, "fichier": os.path.basename(path), "lignes": rows, "premier_id": first_id,
+            "distributions": count_distributions(df)}
+
+def prepare_directory(directory):
+    """
+    Crée le dossier des shards, ou le vide des shards d'une génération précédente
+    (sinon des fichiers part-* en trop resteraient lisibles avec la nouvelle cohorte).
+    Un dossier qui contient d'autres fichiers est refusé plutôt que vidé.
+    """
+    os.makedirs(directory, exist_ok=True)
+    names = os.listdir(directory)
+    others = [name for name in names if not SHARD_NAME.fullmatch(name)]
+    if others:
+        raise FileExistsError(
+            f"Le dossier {directory} contient d'autres fichiers que des shards : {', '.join(sorted(others))}"
         )
-    else:
-        effets_secondaires = []
-    
-    return {
-        "date_consultation": date_consultation.strftime("%d-%m-%Y"),
-        "traitement": traitement,
-        "effets_secondaires": ",".join(effets_secondaires),
-        "reponse_traitement": reponse
+    for name in names:
+        os.remove(os.path.join(directory, name))
+
+def merge_parquet_shards(paths, output):
+    """
+    Réunit les shards Parquet dans un seul fichier (un groupe de lignes par
+    shard, un shard en mémoire à la fois), lisible par le dashboard.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    temporary = f"{output}.tmp"
+    try:
+        for path in paths:
+            table = pq.read_table(path)
+            # Dictionnaires (catégories) d'un type d'index commun à tous les shards
+            schema = pa.schema([
+                pa.field(field.name, pa.dictionary(pa.int32(), field.type.value_type))
+                if pa.types.is_dictionary(field.type) else field
+                for field in table.schema
+            ])
+            table = table.cast(schema).replace_schema_metadata(None)
+            if writer is None:
+                writer = pq.ParquetWriter(temporary, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(temporary, output)
+
+def generate_dataset(n, output, seed=42, file_format="csv", shard_size=1_000_000, workers=None,
+                     reference_date=None):
+    """
+    Génère la cohorte par shards de `shard_size` lignes répartis sur un pool de
+    processus. Chaque shard a sa propre graine dérivée de `seed` (SeedSequence.spawn),
+    le résultat ne dépend donc pas du nombre de workers.
+
+    En CSV, les shards sont concaténés dans `output` ; en Parquet, ils sont
+    réunis dans le fichier `output` s'il se termine par `.parquet` (comme
+    data/dataset.parquet, lu par le dashboard), sinon `output` est un dossier
+    contenant un fichier par shard. Un manifeste (nombre de lignes et contrôle
+    des distributions) est écrit dans `<output>.manifest.json` et renvoyé.
+    """
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+    nb_shards = max(1, -(-n // shard_size))
+    seeds = np.random.SeedSequence(seed).spawn(nb_shards)
+    single_file = file_format == "csv" or output.endswith(".parquet")
+    directory = f"{output}.shards" if single_file else output
+    manifest_path = f"{output}.manifest.json"
+    prepare_directory(directory)
+
+    tasks = []
+    for shard in range(nb_shards):
+        first = shard * shard_size
+        rows = min(shard_size, n - first)
+        extension = "parquet" if file_format == "parquet" else "csv"
+        path = os.path.join(directory, f"part-{shard:05d}.{extension}")
+        tasks.append((shard, rows, first + 1, seeds[shard], reference_date, path, file_format))
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        shards = list(pool.map(generate_shard, *zip(*tasks)))
+
+    if file_format == "csv":
+        # Concaténation des shards dans l'ordre, derrière une seule ligne d'en-tête
+        with open(output, "wb") as destination:
+            destination.write((",".join(generate_cohort(0).columns) + "\n").encode("utf-8"))
+            for _, _, _, _, _, path, _ in tasks:
+                with open(path, "rb") as source:
+                    shutil.copyfileobj(source, destination)
+    elif single_file:
+        merge_parquet_shards([path for _, _, _, _, _, path, _ in tasks], output)
+    if single_file:
+        shutil.rmtree(directory)
+        for result in shards:
+            result.pop("fichier")
+
+    counts = {}
+    for result in shards:
+        merge_counts(counts, result.pop("distributions"))
+    manifest = {
+        "lignes": n,
+        "graine": seed,
+        "format": file_format,
+        "taille_shard": shard_size,
+        "date_reference": reference_date.isoformat(),
+        "shards": shards,
+        "distributions": counts,
+        "controles": check_distributions(counts),
     }
+    with open(manifest_path, "w", encoding="utf-8") as fichier:
+        json.dump(manifest, fichier, ensure_ascii=False, indent=2)
+    return manifest
 
 if __name__ == "__main__":
-    data = []
-    for i in range(1000):
-        patient = generate_patient_infos(i + 1)
-        consultation = generate_consultation(patient) 
-        fusion = {**patient, **consultation}
-        data.append(fusion)
-    
-    df = pd.DataFrame(data)
-    
-    # Vérification rapide de la distribution
-    print("Distribution des maladies:")
-    print(df["maladie"].value_counts(normalize=True))
-    
-    print("\nDistribution des traitements:")
-    print(df["traitement"].value_counts(normalize=True))
-    
-    print("\nDistribution des réponses par traitement:")
-    print(pd.crosstab(df["traitement"], df["reponse_traitement"], normalize="index"))
-    
-    # Sauvegarde du dataset
-    df.to_csv("data/dataset.csv", index=False)
-    print("\nSuccès! Dataset généré avec des distributions réalistes.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Génération d'une cohorte synthétique de patients MICI")
+    parser.add_argument("--n", type=int, default=1000, help="Nombre de patients")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", help="Fichier CSV, fichier .parquet ou dossier Parquet (un fichier par shard) de sortie "
+                             "(par défaut data/dataset.csv ou data/dataset.parquet)")
+    parser.add_argument("--date-reference", type=datetime.date.fromisoformat,
+                        default=DEFAULT_REFERENCE_DATE,
+                        help=f"Date des consultations les plus récentes (AAAA-MM-JJ, par défaut {DEFAULT_REFERENCE_DATE})")
+    parser.add_argument("--shard-size", type=int, default=1_000_000, help="Nombre de patients par shard")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    output = args.output or ("data/dataset.parquet" if args.format == "parquet" else "data/dataset.csv")
+    manifest = generate_dataset(
+        args.n, output,
+        seed=args.seed,
+        file_format=args.format,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        reference_date=args.date_reference,
+    )
+
+    # Vérification rapide des distributions (détail dans le manifeste)
+    for name, check in manifest["controles"].items():
+        print(f"{name:<24} écart max : {check['ecart_max'] * 100:.2f} points")
+    print(f"\nSuccès! Dataset de {args.n} patients généré avec des distributions réalistes : {output}")
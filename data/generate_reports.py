@@ -0,0 +1,354 @@
+"""
+Génération d'un corpus de comptes-rendus fictifs annotés.
+
+Chaque patient d'une cohorte synthétique (generate_data.py) reçoit un
+compte-rendu en français, de la note de consultation de quelques lignes au
+compte-rendu d'hospitalisation de plusieurs pages. Les maladies, traitements et
+symptômes cités sont annotés (catégorie, position, forme, identifiant), ce qui
+permet de mesurer à la fois le débit et la précision/le rappel de l'extraction.
+
+Exemple :
+    python data/generate_reports.py --n 100000 --seed 42 --output data/corpus.jsonl
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import re
+import string
+import unicodedata
+from collections import namedtuple
+import numpy as np
+from generate_data import DEFAULT_REFERENCE_DATE, disease_type, generate_cohort
+
+# Dossier des lexiques utilisés par l'extraction (identifiants canoniques et synonymes)
+LEXICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexiques")
+
+# Longueur des comptes-rendus : (type, poids)
+REPORT_KINDS = [("consultation", 0.50), ("suivi", 0.35), ("hospitalisation", 0.15)]
+
+# Formes citées pour chaque type de maladie (identifiant du lexique, formes possibles)
+DISEASE_MENTIONS = {
+    "Crohn": ("crohn", ["maladie de Crohn", "Crohn"]),
+    "RCH": ("rch", ["rectocolite hémorragique", "RCH", "colite ulcéreuse"]),
+    "MICI": ("mici", ["MICI", "maladie inflammatoire chronique intestinale"]),
+}
+
+# Localisation précisée après la maladie (texte libre, non annoté)
+LOCATIONS = {
+    "Crohn iléo-colique": "de localisation iléo-colique",
+    "Crohn colique": "de localisation colique",
+    "Crohn iléal": "de localisation iléale",
+    "RCH extensive": "dans sa forme étendue",
+    "RCH distale": "dans sa forme distale",
+    "MICI indéterminée": "de classification indéterminée",
+}
+
+# Symptômes de poussée (identifiants du lexique des symptômes)
+FLARE_SYMPTOMS = ["diarrhee", "douleur_abdominale", "sang_selles", "fatigue", "perte_poids", "fievre", "asthenie"]
+
+# Corticoïdes cités en cas de poussée (identifiants du lexique des traitements)
+STEROIDS = ["prednisone", "methylprednisolone"]
+
+# Notes d'évolution quotidienne sans entité
+DAILY_NOTES = [
+    "état général conservé, alimentation reprise progressivement.",
+    "diminution de la fréquence des selles, bilan biologique en amélioration.",
+    "patient(e) apyrétique, hémodynamique stable.",
+    "CRP en baisse, poursuite du traitement intraveineux.",
+    "examen abdominal rassurant, mobilisation au fauteuil.",
+    "pas d'événement notable dans les dernières 24 heures.",
+]
+
+# Une mention à insérer : catégorie et identifiant de l'entité, forme écrite dans le texte
+Mention = namedtuple("Mention", ["categorie", "terme", "forme"])
+
+
+def load_lexicons(directory=LEXICON_DIR):
+    """
+    Identifiant -> (catégorie, libellé, synonymes) pour toutes les entrées des lexiques.
+    """
+    entries = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as fichier:
+            lexicon = json.load(fichier)
+        for entry in lexicon["entrees"]:
+            entries[entry["id"]] = (lexicon["categorie"], entry["libelle"], entry.get("synonymes", []))
+    return entries
+
+
+def slug(label):
+    """
+    Identifiant d'une entité absente des lexiques (ex : "Céphalées" -> "cephalees").
+    """
+    ascii_label = unicodedata.normalize("NFKD", label).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "_", ascii_label.lower()).strip("_")
+
+
+class Report:
+    """
+    Compte-rendu en cours de rédaction : le texte et les positions des mentions insérées.
+    """
+
+    _formatter = string.Formatter()
+
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.entities = []
+
+    def write(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+
+    def mention(self, mention):
+        self.entities.append({
+            "categorie": mention.categorie,
+            "debut": self.length,
+            "fin": self.length + len(mention.forme),
+            "forme": mention.forme,
+            "terme": mention.terme,
+        })
+        self.write(mention.forme)
+
+    def line(self, template="", **values):
+        """
+        Ajoute une ligne ; les champs du modèle reçoivent du texte ou une Mention
+        (éventuellement une liste de mentions, séparées par des virgules).
+        """
+        for literal, field, _, _ in self._formatter.parse(template):
+            self.write(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if isinstance(value, Mention):
+                self.mention(value)
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    if index:
+                        self.write(", " if index < len(value) - 1 else " et ")
+                    self.mention(item)
+            else:
+                self.write(str(value))
+        self.write("\n")
+
+    def text(self):
+        return "".join(self.parts)
+
+
+class ReportWriter:
+    """
+    Rédige les comptes-rendus à partir des lignes d'une cohorte.
+    """
+
+    def __init__(self, seed=None, lexicons=None):
+        self.random = random.Random(seed)
+        self.lexicons = lexicons or load_lexicons()
+        # Forme écrite -> identifiant, pour les effets secondaires présents dans les lexiques
+        self.forms = {}
+        for identifier, (category, label, synonyms) in self.lexicons.items():
+            for form in [label] + synonyms:
+                self.forms.setdefault((category, form.lower()), identifier)
+
+    def entity(self, identifier):
+        category, label, others = self.lexicons[identifier]
+        return Mention(category, identifier, self.random.choice([label] + others))
+
+    def disease(self, maladie):
+        identifier, forms = DISEASE_MENTIONS[disease_type(maladie)]
+        return Mention(self.lexicons[identifier][0], identifier, self.random.choice(forms))
+
+    def treatment(self, name):
+        return self.entity(slug(name))
+
+    def side_effects(self, effects):
+        mentions = []
+        for effect in effects.split(",") if isinstance(effects, str) else []:
+            form = effect.lower()
+            identifier = self.forms.get(("symptome", effect.lower()), slug(effect))
+            mentions.append(Mention("symptome", identifier, form))
+        return mentions
+
+    def symptoms(self, count):
+        mentions = [self.entity(identifier) for identifier in self.random.sample(FLARE_SYMPTOMS, count)]
+        return [mention._replace(forme=mention.forme.lower()) for mention in mentions]
+
+    def previous_treatment(self, current):
+        candidates = [identifier for identifier in ("mesalazine", "azathioprine", "infliximab", "adalimumab")
+                      if identifier != slug(current)]
+        return self.entity(self.random.choice(candidates))
+
+    def write_report(self, patient):
+        kind = self.random.choices(
+            [kind for kind, _ in REPORT_KINDS], weights=[weight for _, weight in REPORT_KINDS]
+        )[0]
+        report = Report()
+        getattr(self, f"_{kind}")(report, patient)
+        return kind, report
+
+    def _header(self, report, patient, title):
+        civility = "Monsieur" if patient["sexe"] == "H" else "Madame"
+        report.line(title)
+        report.line()
+        report.line("Date : {date}", date=patient["date_consultation"].replace("-", "/"))
+        report.line("{civility}, {age} ans.", civility=civility, age=patient["age"])
+
+    def _consultation(self, report, patient):
+        self._header(report, patient, "Note de consultation - Gastro-entérologie")
+        report.line(
+            "Suivi d'une {maladie} {location}, évoluant depuis {duree} ans.",
+            maladie=self.disease(patient["maladie"]), location=LOCATIONS[patient["maladie"]],
+            duree=patient["anciennete"],
+        )
+        report.line("Traitement en cours : {traitement}.", traitement=self.treatment(patient["traitement"]))
+        effects = self.side_effects(patient["effets_secondaires"])
+        if effects:
+            report.line("Effets indésirables rapportés : {effets}.", effets=effects)
+        else:
+            report.line("Pas d'effet indésirable rapporté.")
+        report.line("Réponse clinique : {reponse}.", reponse=patient["reponse_traitement"].lower())
+
+    def _suivi(self, report, patient):
+        self._header(report, patient, "Consultation de suivi - Service d'Hépato-Gastroentérologie")
+        report.line()
+        report.line("ANTÉCÉDENTS :")
+        report.line(
+            "- {maladie} {location}, diagnostiquée il y a {duree} ans",
+            maladie=self.disease(patient["maladie"]), location=LOCATIONS[patient["maladie"]],
+            duree=patient["anciennete"],
+        )
+        report.line("- Appendicectomie dans l'enfance" if self.random.random() < 0.3 else "- Pas d'antécédent chirurgical")
+        report.line()
+        report.line("HISTOIRE DE LA MALADIE :")
+        report.line(
+            "Initialement traité(e) par {ancien}, relais par {traitement} devant une réponse insuffisante.",
+            ancien=self.previous_treatment(patient["traitement"]), traitement=self.treatment(patient["traitement"]),
+        )
+        if patient["reponse_traitement"] in ("Échec", "Rechute"):
+            report.line("Depuis quelques semaines, réapparition de {symptomes}.", symptomes=self.symptoms(2))
+        else:
+            report.line("Évolution clinique globalement satisfaisante depuis la dernière consultation.")
+        effects = self.side_effects(patient["effets_secondaires"])
+        if effects:
+            report.line("Sont signalés depuis l'introduction du traitement : {effets}.", effets=effects)
+        report.line()
+        report.line("CONCLUSION :")
+        report.line(
+            "Réponse jugée : {reponse}. Poursuite de {traitement}, contrôle dans 3 mois.",
+            reponse=patient["reponse_traitement"].lower(), traitement=self.treatment(patient["traitement"]),
+        )
+
+    def _hospitalisation(self, report, patient):
+        self._header(report, patient, "Compte-rendu d'hospitalisation - Service d'Hépato-Gastroentérologie")
+        report.line()
+        report.line("MOTIF D'HOSPITALISATION :")
+        report.line(
+            "Poussée de {maladie} avec {symptomes}.",
+            maladie=self.disease(patient["maladie"]), symptomes=self.symptoms(self.random.randint(2, 3)),
+        )
+        report.line()
+        report.line("ANTÉCÉDENTS :")
+        report.line(
+            "- {maladie} {location}, diagnostiquée il y a {duree} ans",
+            maladie=self.disease(patient["maladie"]), location=LOCATIONS[patient["maladie"]],
+            duree=patient["anciennete"],
+        )
+        report.line("- Pas d'allergie médicamenteuse connue")
+        report.line()
+        report.line("HISTOIRE DE LA MALADIE :")
+        report.line(
+            "Patient(e) suivi(e) depuis {duree} ans, initialement stabilisé(e) sous {ancien}, "
+            "puis passage à {traitement}.",
+            duree=patient["anciennete"], ancien=self.previous_treatment(patient["traitement"]),
+            traitement=self.treatment(patient["traitement"]),
+        )
+        report.line(
+            "Depuis {semaines} semaines, recrudescence des symptômes avec {symptomes}.",
+            semaines=self.random.randint(2, 6), symptomes=self.symptoms(self.random.randint(1, 3)),
+        )
+        report.line()
+        report.line("TRAITEMENT À L'ENTRÉE :")
+        report.line("- {traitement} selon le schéma habituel", traitement=self.treatment(patient["traitement"]))
+        report.line()
+        report.line("EXAMEN CLINIQUE :")
+        report.line(
+            "Poids : {poids} kg, TA : {tas}/{tad} mmHg, Pouls : {pouls}/min, T° : {temperature} °C",
+            poids=self.random.randint(48, 95), tas=self.random.randint(100, 140), tad=self.random.randint(60, 90),
+            pouls=self.random.randint(60, 110), temperature=f"{self.random.uniform(36.5, 38.9):.1f}",
+        )
+        report.line("Abdomen souple mais sensible de façon diffuse, sans défense ni contracture.")
+        report.line()
+        report.line("EXAMENS COMPLÉMENTAIRES :")
+        report.line(
+            "- Biologie : Hb {hb} g/dL, CRP {crp} mg/L",
+            hb=f"{self.random.uniform(8.5, 14.5):.1f}", crp=self.random.randint(2, 120),
+        )
+        report.line("- Calprotectine fécale : {calpro} µg/g", calpro=self.random.randint(50, 2000))
+        report.line("- Coproculture : négative")
+        report.line()
+        report.line("PRISE EN CHARGE ET ÉVOLUTION :")
+        report.line("- Corticothérapie IV ({corticoide} 60 mg/j)", corticoide=self.entity("methylprednisolone"))
+        report.line("- Hydratation IV et surveillance biologique quotidienne")
+        effects = self.side_effects(patient["effets_secondaires"])
+        if effects:
+            report.line("Effets indésirables attribués au traitement au cours du séjour : {effets}.", effets=effects)
+        report.line("Évolution {evolution}.", evolution="favorable" if patient["reponse_traitement"] in ("Efficace", "Partiel") else "lente")
+        report.line()
+        report.line("ÉVOLUTION JOUR PAR JOUR :")
+        for day in range(1, self.random.randint(3, 15)):
+            if self.random.random() < 0.3:
+                report.line("J{day} : persistance de {symptome}, poursuite de la surveillance.",
+                            day=day, symptome=self.symptoms(1)[0])
+            else:
+                report.line("J{day} : {etat}", day=day, etat=self.random.choice(DAILY_NOTES))
+        report.line()
+        report.line("TRAITEMENT DE SORTIE :")
+        report.line("- {corticoide} 40 mg/j à décroissance progressive", corticoide=self.entity(self.random.choice(STEROIDS)))
+        report.line("- Poursuite de {traitement}", traitement=self.treatment(patient["traitement"]))
+        report.line()
+        report.line("SUIVI :")
+        report.line("- Consultation de contrôle dans 4 semaines")
+        report.line("- Calprotectine fécale de contrôle à 2 mois")
+        report.line()
+        report.line("Dr. {medecin}", medecin=self.random.choice(["MARTIN", "BERNARD", "DUBOIS", "LEROY", "MOREAU"]))
+
+
+def generate_reports(n, seed=42, reference_date=None, block_size=100_000):
+    """
+    Génère `n` comptes-rendus annotés, bloc par bloc : chaque élément est un
+    dictionnaire (id, type, texte_compte_rendu, entites).
+    """
+    writer = ReportWriter(seed)
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-n // block_size)))
+    for block, block_seed in enumerate(seeds):
+        first = block * block_size
+        cohort = generate_cohort(min(block_size, n - first), block_seed, reference_date, first + 1)
+        for patient in cohort.astype(object).where(cohort.notna(), None).to_dict("records"):
+            kind, report = writer.write_report(patient)
+            yield {
+                "id": str(patient["id"]),
+                "type": kind,
+                "texte_compte_rendu": report.text(),
+                "entites": report.entities,
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération d'un corpus de comptes-rendus annotés")
+    parser.add_argument("--n", type=int, default=1000, help="Nombre de comptes-rendus")
+    parser.add_argument("--seed", type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument("--output", default="data/corpus.jsonl", help="Fichier JSONL de sortie")
+    parser.add_argument("--date-reference", type=datetime.date.fromisoformat,
+                        default=DEFAULT_REFERENCE_DATE,
+                        help=f"Date des consultations les plus récentes (AAAA-MM-JJ, par défaut {DEFAULT_REFERENCE_DATE})")
+    args = parser.parse_args()
+
+    counts = {}
+    with open(args.output, "w", encoding="utf-8") as fichier:
+        for record in generate_reports(args.n, args.seed, args.date_reference):
+            fichier.write(json.dumps(record, ensure_ascii=False) + "\n")
+            counts[record["type"]] = counts.get(record["type"], 0) + 1
+    print(f"{args.n} comptes-rendus écrits dans {args.output} : {counts}")